@@ -1,12 +1,12 @@
 import os
+from functools import lru_cache
 from typing import Dict, Any, List
 from langchain.agents import create_react_agent, AgentExecutor, initialize_agent, AgentType
 from langchain.prompts import PromptTemplate
 from langchain_openai import ChatOpenAI
-from langchain.vectorstores import FAISS
-from langchain.embeddings import OpenAIEmbeddings
 from sqlalchemy import create_engine
 from .base_agent import BaseAgent, AgentStatus
+from services.agent import get_embeddings, load_faiss_store
 from services.agent_tools import (
     initialize_tools, query_documents, extract_treaty_exclusions,
     validate_claim_against_exclusions, extract_bordereaux_claims,
@@ -16,6 +16,10 @@ from services.agent_tools import (
     calculate_recovery_amounts
 )
 
+@lru_cache(maxsize=None)
+def _get_analysis_llm(openai_api_key: str) -> ChatOpenAI:
+    return ChatOpenAI(model="gpt-4o", api_key=openai_api_key, temperature=0)
+
 class ClaimsAnalysisAgent(BaseAgent):
     
     def __init__(self, agent_id: str, websocket_manager=None):
@@ -86,13 +90,13 @@ class ClaimsAnalysisAgent(BaseAgent):
         if not openai_api_key:
             raise Exception("OPENAI_API_KEY not found in environment")
         
-        self.llm = ChatOpenAI(model="gpt-4o", api_key=openai_api_key, temperature=0)
+        # Clients are shared across runs; only the vector store and tool wiring are per run
+        self.llm = _get_analysis_llm(openai_api_key)
         
-        embeddings = OpenAIEmbeddings(openai_api_key=openai_api_key)
-        self.vector_store = FAISS.load_local(vector_store_path, embeddings, allow_dangerous_deserialization=True)
+        self.vector_store = load_faiss_store(vector_store_path, get_embeddings(openai_api_key))
         
         if database_url:
-            initialize_tools(self.vector_store, database_url, openai_api_key)
+            initialize_tools(self.vector_store, database_url)
         
         self.tools = [
             query_documents,
@@ -3,8 +3,8 @@ from typing import Dict, Any, List, Optional
 from dataclasses import dataclass
 from enum import Enum
 import asyncio
-import json
 from datetime import datetime
+from websocket_manager import dumps_message
 
 class AgentStatus(Enum):
     INITIALIZED = "initialized"
@@ -55,7 +55,7 @@ class BaseAgent(ABC):
         )
         
         if self.websocket_manager:
-            await self.websocket_manager.broadcast(json.dumps({
+            await self.websocket_manager.broadcast(dumps_message({
                 "agent_id": update.agent_id,
                 "timestamp": update.timestamp.isoformat(),
                 "status": update.status.value,
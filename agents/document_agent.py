@@ -1,11 +1,13 @@
+import asyncio
 import os
 from typing import Dict, Any, List
 from pathlib import Path
 import shutil
 from .base_agent import BaseAgent, AgentStatus
 from services.gmail_reader import FocusedGmailConnector
-from services.email_analyzer import SimpleEmailAnalyzer
+from services.email_analyzer import get_email_analyzer
 from services.agent import DocumentEmbeddingSystem
+from document_processing.processors.page_classifier import classify_page_content
 
 class DocumentAgent(BaseAgent):
     
@@ -14,8 +16,9 @@ class DocumentAgent(BaseAgent):
         self.gmail_connector = None
         self.email_analyzer = None
         self.embedding_system = None
-        self.download_folder = "downloads"
-        self.vector_store_path = "claims_vector_store"
+        # Per-run working paths so concurrent runs don't wipe each other's attachments
+        self.download_folder = os.path.join("downloads", agent_id)
+        self.vector_store_path = os.path.join("claims_vector_store", agent_id)
     
     async def execute(self, sender_email: str = "Maundu@kenyare.co.ke") -> Dict[str, Any]:
         try:
@@ -94,17 +97,25 @@ class DocumentAgent(BaseAgent):
             raise Exception("Missing required environment variables")
         
         self.gmail_connector = FocusedGmailConnector(email_host, email_password)
-        self.email_analyzer = SimpleEmailAnalyzer(openai_api_key)
+        self.email_analyzer = get_email_analyzer(openai_api_key)
         self.embedding_system = DocumentEmbeddingSystem(openai_api_key, self.download_folder)
         
         os.makedirs(self.download_folder, exist_ok=True)
     
+    # IMAP, PDF parsing and the OpenAI calls below are blocking, so they run in
+    # worker threads to keep the event loop free for websocket updates
     async def _fetch_latest_email(self, sender_email: str):
+        return await asyncio.to_thread(self._read_latest_email, sender_email)
+    
+    def _read_latest_email(self, sender_email: str):
         with self.gmail_connector:
             latest_email = self.gmail_connector.read_latest_email_from_sender(sender_email)
             return latest_email
     
     async def _download_attachments(self, email_content) -> List[str]:
+        return await asyncio.to_thread(self._save_attachments, email_content)
+    
+    def _save_attachments(self, email_content) -> List[str]:
         if Path(self.download_folder).exists():
             shutil.rmtree(self.download_folder)
         os.makedirs(self.download_folder, exist_ok=True)
@@ -126,7 +137,7 @@ class DocumentAgent(BaseAgent):
         }
         
         for file_path in downloaded_files:
-            file_analysis = await self._analyze_single_file(file_path)
+            file_analysis = await asyncio.to_thread(self._analyze_single_file, file_path)
             document_analysis["file_analysis"].append(file_analysis)
             
             for doc_type in file_analysis.get("detected_types", []):
@@ -143,8 +154,9 @@ class DocumentAgent(BaseAgent):
         
         return document_analysis
     
-    async def _analyze_single_file(self, file_path: str) -> Dict[str, Any]:
+    def _analyze_single_file(self, file_path: str) -> Dict[str, Any]:
         import fitz
+        from document_processing.processors.pdf_processor import PDF_TEXT_FLAGS
         from pathlib import Path
         
         path = Path(file_path)
@@ -157,25 +169,23 @@ class DocumentAgent(BaseAgent):
         
         if path.suffix.lower() == '.pdf':
             try:
-                pdf_doc = fitz.open(file_path)
-                file_analysis["total_pages"] = len(pdf_doc)
-                
-                for page_num in range(len(pdf_doc)):
-                    page = pdf_doc[page_num]
-                    page_text = page.get_text()
+                with fitz.open(file_path) as pdf_doc:
+                    file_analysis["total_pages"] = len(pdf_doc)
                     
-                    doc_type = self._classify_page_content(page_text)
-                    file_analysis["page_analysis"].append({
-                        "page": page_num + 1,
-                        "document_type": doc_type,
-                        "content_length": len(page_text),
-                        "has_tables": self._detect_tabular_content(page_text)
-                    })
-                    
-                    if doc_type != "unknown" and doc_type not in file_analysis["detected_types"]:
-                        file_analysis["detected_types"].append(doc_type)
-                
-                pdf_doc.close()
+                    for page_num in range(len(pdf_doc)):
+                        page = pdf_doc[page_num]
+                        page_text = page.get_text("text", flags=PDF_TEXT_FLAGS)
+                        
+                        doc_type = classify_page_content(page_text)
+                        file_analysis["page_analysis"].append({
+                            "page": page_num + 1,
+                            "document_type": doc_type,
+                            "content_length": len(page_text),
+                            "has_tables": self._detect_tabular_content(page_text)
+                        })
+                        
+                        if doc_type != "unknown" and doc_type not in file_analysis["detected_types"]:
+                            file_analysis["detected_types"].append(doc_type)
                 
             except Exception:
                 file_analysis["detected_types"] = ["unknown"]
@@ -187,20 +197,6 @@ class DocumentAgent(BaseAgent):
         
         return file_analysis
     
-    def _classify_page_content(self, content: str) -> str:
-        content_lower = content.lower()
-        
-        if any(term in content_lower for term in ["bordereaux", "claim number", "transaction date", "paid amount", "outstanding"]):
-            return "claims_bordereaux"
-        elif any(term in content_lower for term in ["statement", "quarterly", "account", "balance", "commission", "total income"]):
-            return "cedant_statement"
-        elif any(term in content_lower for term in ["notification", "claim notification", "insured name", "date of loss"]):
-            return "claim_notification"
-        elif any(term in content_lower for term in ["treaty", "reinsured", "commission rate", "profit commission"]):
-            return "treaty_contract"
-        else:
-            return "unknown"
-    
     def _classify_file_by_extension(self, extension: str) -> str:
         if extension in ['.xlsx', '.xls']:
             return "claims_bordereaux"
@@ -231,16 +227,18 @@ class DocumentAgent(BaseAgent):
         
         enhanced_body = f"{email_content.body_text}\n\nDETAILED FILE ANALYSIS:\n" + "\n".join(attachment_info)
         
-        analysis = self.email_analyzer.analyze_email_content(
+        analysis = await asyncio.to_thread(
+            self.email_analyzer.analyze_email_content,
             email_content.subject,
             enhanced_body,
-            email_content.attachment_filenames
+            email_content.attachment_filenames,
+            email_content.sender
         )
         return analysis
     
     async def _create_embeddings(self, downloaded_files: List[str]):
         try:
-            vector_store = self.embedding_system.build_vector_store(self.vector_store_path)
+            vector_store = await asyncio.to_thread(self.embedding_system.build_vector_store, self.vector_store_path)
             return vector_store
         except Exception as e:
             raise Exception(f"Failed to create embeddings: {str(e)}")
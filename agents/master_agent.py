@@ -1,4 +1,5 @@
 import asyncio
+import shutil
 from typing import Dict, Any, List
 from .base_agent import BaseAgent, AgentStatus
 from .document_agent import DocumentAgent
@@ -43,6 +44,14 @@ class MasterClaimsAgent(BaseAgent):
             error_msg = f"Master agent execution failed: {str(e)}"
             await self.send_update("error", error_msg, self.progress, error=error_msg)
             raise
+        finally:
+            self._remove_run_files()
+    
+    def _remove_run_files(self):
+        # The report is written to reports/; the run's attachments and index are no longer needed
+        if self.document_agent:
+            shutil.rmtree(self.document_agent.download_folder, ignore_errors=True)
+            shutil.rmtree(self.document_agent.vector_store_path, ignore_errors=True)
     
     async def _run_document_processing(self, sender_email: str) -> Dict[str, Any]:
         self.document_agent = DocumentAgent(f"{self.agent_id}_document", self.websocket_manager)
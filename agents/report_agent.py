@@ -2,59 +2,16 @@ import os
 from typing import Dict, Any, List
 from datetime import datetime
 from pathlib import Path
-from jinja2 import Template
-from weasyprint import HTML, CSS
 from .base_agent import BaseAgent, AgentStatus
 
-class ReportGenerationAgent(BaseAgent):
-    
-    def __init__(self, agent_id: str, websocket_manager=None):
-        super().__init__(agent_id, websocket_manager)
-        self.report_template = None
-        self.output_folder = "reports"
-    
-    async def execute(self, analysis_results: Dict[str, Any], document_results: Dict[str, Any]) -> Dict[str, Any]:
-        try:
-            self.status = AgentStatus.PROCESSING
-            await self.send_update("initialization", "Initializing report generation", 5.0)
-            
-            os.makedirs(self.output_folder, exist_ok=True)
-            
-            await self.send_update("template_preparation", "Preparing report template", 15.0)
-            self._prepare_template()
-            
-            await self.send_update("data_compilation", "Compiling analysis data", 25.0)
-            report_data = await self._compile_report_data(analysis_results, document_results)
-            
-            await self.send_update("html_generation", "Generating HTML report", 45.0)
-            html_content = await self._generate_html_report(report_data)
-            
-            await self.send_update("pdf_conversion", "Converting to PDF", 65.0)
-            pdf_path = await self._generate_pdf_report(html_content, report_data)
-            
-            await self.send_update("summary_generation", "Generating executive summary", 80.0)
-            executive_summary = await self._generate_executive_summary(report_data)
-            
-            self.status = AgentStatus.COMPLETED
-            self.results = {
-                "pdf_report_path": pdf_path,
-                "html_content": html_content,
-                "executive_summary": executive_summary,
-                "report_data": report_data,
-                "generation_timestamp": datetime.utcnow().isoformat()
-            }
-            
-            await self.send_update("completion", f"Report generated successfully: {pdf_path}", 100.0)
-            
-            return self.results
-            
-        except Exception as e:
-            error_msg = f"Report generation failed: {str(e)}"
-            await self.send_update("error", error_msg, self.progress, error=error_msg)
-            raise
-    
-    def _prepare_template(self):
-        self.report_template = Template("""
+ZERO_AMOUNTS = {
+    "bordereaux_total": "0.00",
+    "statement_total": "0.00",
+    "variance": "0.00",
+    "variance_percent": "0.0"
+}
+
+REPORT_TEMPLATE = """
         <!DOCTYPE html>
         <html>
         <head>
@@ -482,38 +439,114 @@ class ReportGenerationAgent(BaseAgent):
             </div>
         </body>
         </html>
-        """)
+"""
+
+class ReportGenerationAgent(BaseAgent):
+    
+    _compiled_template = None
+    
+    def __init__(self, agent_id: str, websocket_manager=None):
+        super().__init__(agent_id, websocket_manager)
+        self.report_template = None
+        self.output_folder = "reports"
+    
+    async def execute(self, analysis_results: Dict[str, Any], document_results: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            self.status = AgentStatus.PROCESSING
+            await self.send_update("initialization", "Initializing report generation", 5.0)
+            
+            os.makedirs(self.output_folder, exist_ok=True)
+            
+            await self.send_update("template_preparation", "Preparing report template", 15.0)
+            self._prepare_template()
+            
+            await self.send_update("data_compilation", "Compiling analysis data", 25.0)
+            report_data = await self._compile_report_data(analysis_results, document_results)
+            
+            await self.send_update("html_generation", "Generating HTML report", 45.0)
+            html_content = await self._generate_html_report(report_data)
+            
+            await self.send_update("pdf_conversion", "Converting to PDF", 65.0)
+            pdf_path = await self._generate_pdf_report(html_content, report_data)
+            
+            await self.send_update("summary_generation", "Generating executive summary", 80.0)
+            executive_summary = await self._generate_executive_summary(report_data)
+            
+            self.status = AgentStatus.COMPLETED
+            self.results = {
+                "pdf_report_path": pdf_path,
+                "html_content": html_content,
+                "executive_summary": executive_summary,
+                "report_data": report_data,
+                "generation_timestamp": datetime.utcnow().isoformat()
+            }
+            
+            await self.send_update("completion", f"Report generated successfully: {pdf_path}", 100.0)
+            
+            return self.results
+            
+        except Exception as e:
+            error_msg = f"Report generation failed: {str(e)}"
+            await self.send_update("error", error_msg, self.progress, error=error_msg)
+            raise
+    
+    def _prepare_template(self):
+        if ReportGenerationAgent._compiled_template is None:
+            from jinja2 import Template
+            ReportGenerationAgent._compiled_template = Template(REPORT_TEMPLATE)
+        self.report_template = ReportGenerationAgent._compiled_template
     
     async def _compile_report_data(self, analysis_results: Dict[str, Any], document_results: Dict[str, Any]) -> Dict[str, Any]:
+        fraud_analysis = analysis_results.get("fraud_analysis") or {}
+        exclusion_analysis = analysis_results.get("exclusion_analysis") or {}
+        reconciliation_results = analysis_results.get("reconciliation_results") or {}
+        date_validation = analysis_results.get("date_validation") or {}
+        duplicate_check = analysis_results.get("duplicate_check") or {}
+        compliance_results = analysis_results.get("compliance_results") or {}
+        email_analysis = document_results.get("email_analysis") or {}
+        
+        recommendation = analysis_results.get("overall_recommendation", "REVIEW")
+        fraud_risk = fraud_analysis.get("risk_level", "UNKNOWN")
+        
         return {
             "report_id": f"CLM-{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}",
             "report_date": datetime.utcnow().strftime('%B %d, %Y at %I:%M %p UTC'),
-            "recommendation": analysis_results.get("overall_recommendation", "REVIEW"),
-            "fraud_risk": analysis_results.get("fraud_analysis", {}).get("risk_level", "UNKNOWN"),
+            "recommendation": recommendation,
+            "fraud_risk": fraud_risk,
             "email_data": document_results.get("email_content", {}),
-            "email_analysis": document_results.get("email_analysis", {}),
-            "documents_found": document_results.get("email_analysis", {}).get("documents_found", []),
-            "key_findings": self._extract_key_findings(analysis_results),
-            "fraud_analysis_summary": analysis_results.get("fraud_analysis", {}).get("agent_response", "No analysis available"),
-            "fraud_indicators": self._extract_fraud_indicators(analysis_results),
-            "exclusion_violations": self._extract_exclusion_violations(analysis_results),
-            "reconciliation_issues": self._extract_reconciliation_issues(analysis_results),
-            "amounts": self._extract_amounts(analysis_results),
-            "date_validation_errors": self._extract_date_errors(analysis_results),
-            "duplicate_claims": self._extract_duplicate_claims(analysis_results),
-            "compliance_issues": self._extract_compliance_issues(analysis_results),
-            "recommendation_rationale": self._generate_rationale(analysis_results),
-            "next_actions": self._generate_next_actions(analysis_results)
+            "email_analysis": email_analysis,
+            "documents_found": email_analysis.get("documents_found", []),
+            "key_findings": self._extract_key_findings(
+                fraud_risk, exclusion_analysis, duplicate_check,
+                reconciliation_results, date_validation, compliance_results
+            ),
+            "fraud_analysis_summary": fraud_analysis.get("agent_response", "No analysis available"),
+            "fraud_indicators": self._extract_fraud_indicators(self._lowered_response(fraud_analysis)),
+            "exclusion_violations": self._extract_exclusion_violations(self._lowered_response(exclusion_analysis)),
+            "reconciliation_issues": self._extract_reconciliation_issues(self._lowered_response(reconciliation_results)),
+            # Amounts aren't parsed from the reconciliation yet; a copy keeps the defaults unshared
+            "amounts": dict(ZERO_AMOUNTS),
+            "date_validation_errors": self._extract_date_errors(self._lowered_response(date_validation)),
+            "duplicate_claims": self._extract_duplicate_claims(self._lowered_response(duplicate_check)),
+            "compliance_issues": self._extract_compliance_issues(self._lowered_response(compliance_results)),
+            "recommendation_rationale": self._generate_rationale(recommendation),
+            "next_actions": self._generate_next_actions(recommendation)
         }
     
+    @staticmethod
+    def _lowered_response(section: Dict[str, Any]) -> str:
+        return (section.get("agent_response") or "").lower()
+    
     async def _generate_html_report(self, report_data: Dict[str, Any]) -> str:
         return self.report_template.render(**report_data)
     
     async def _generate_pdf_report(self, html_content: str, report_data: Dict[str, Any]) -> str:
         timestamp = datetime.utcnow().strftime('%Y%m%d_%H%M%S')
-        pdf_filename = f"claims_analysis_report_{timestamp}.pdf"
+        pdf_filename = f"claims_analysis_report_{timestamp}_{self.agent_id}.pdf"
         pdf_path = os.path.join(self.output_folder, pdf_filename)
         
+        from weasyprint import HTML, CSS
+        
         css = CSS(string='''
             @page {
                 size: A4;
@@ -534,7 +567,7 @@ class ReportGenerationAgent(BaseAgent):
             }
         ''')
         
-        HTML(string=html_content).write_pdf(pdf_path, stylesheets=[css])
+        HTML(string=html_content).write_pdf(pdf_path, stylesheets=[css], uncompressed_pdf=False)
         return pdf_path
     
     async def _generate_executive_summary(self, report_data: Dict[str, Any]) -> str:
@@ -566,25 +599,27 @@ KEY FINDINGS:"""
         
         return summary
     
-    def _extract_key_findings(self, analysis_results: Dict[str, Any]) -> List[str]:
+    def _extract_key_findings(self, fraud_risk: str, exclusion_analysis: Dict[str, Any], duplicate_check: Dict[str, Any],
+                              reconciliation_results: Dict[str, Any], date_validation: Dict[str, Any],
+                              compliance_results: Dict[str, Any]) -> List[str]:
         findings = []
         
-        if analysis_results.get("fraud_analysis", {}).get("risk_level") == "HIGH":
+        if fraud_risk == "HIGH":
             findings.append("High fraud risk detected - requires immediate review")
         
-        if analysis_results.get("exclusion_analysis", {}).get("violations_found"):
+        if exclusion_analysis.get("violations_found"):
             findings.append("Treaty exclusion violations identified")
         
-        if analysis_results.get("duplicate_check", {}).get("duplicates_found"):
+        if duplicate_check.get("duplicates_found"):
             findings.append("Duplicate claims detected in system")
         
-        if analysis_results.get("reconciliation_results", {}).get("discrepancies_found"):
+        if reconciliation_results.get("discrepancies_found"):
             findings.append("Amount discrepancies found between documents")
         
-        if analysis_results.get("date_validation", {}).get("validation_failures"):
+        if date_validation.get("validation_failures"):
             findings.append("Date validation failures identified")
         
-        if analysis_results.get("compliance_results", {}).get("compliance_issues"):
+        if compliance_results.get("compliance_issues"):
             findings.append("Regulatory compliance issues detected")
         
         if not findings:
@@ -592,9 +627,8 @@ KEY FINDINGS:"""
         
         return findings
     
-    def _extract_fraud_indicators(self, analysis_results: Dict[str, Any]) -> List[str]:
+    def _extract_fraud_indicators(self, fraud_response: str) -> List[str]:
         indicators = []
-        fraud_response = analysis_results.get("fraud_analysis", {}).get("agent_response", "").lower()
         
         if "unusual amount" in fraud_response:
             indicators.append("Unusual claim amounts detected")
@@ -607,9 +641,8 @@ KEY FINDINGS:"""
         
         return indicators
     
-    def _extract_exclusion_violations(self, analysis_results: Dict[str, Any]) -> List[str]:
+    def _extract_exclusion_violations(self, exclusion_response: str) -> List[str]:
         violations = []
-        exclusion_response = analysis_results.get("exclusion_analysis", {}).get("agent_response", "").lower()
         
         if "war" in exclusion_response and "violation" in exclusion_response:
             violations.append("War exclusion violation detected")
@@ -620,9 +653,8 @@ KEY FINDINGS:"""
         
         return violations
     
-    def _extract_reconciliation_issues(self, analysis_results: Dict[str, Any]) -> List[str]:
+    def _extract_reconciliation_issues(self, reconciliation_response: str) -> List[str]:
         issues = []
-        reconciliation_response = analysis_results.get("reconciliation_results", {}).get("agent_response", "").lower()
         
         if "discrepancy" in reconciliation_response:
             issues.append("Amount discrepancies identified between documents")
@@ -631,17 +663,8 @@ KEY FINDINGS:"""
         
         return issues
     
-    def _extract_amounts(self, analysis_results: Dict[str, Any]) -> Dict[str, str]:
-        return {
-            "bordereaux_total": "0.00",
-            "statement_total": "0.00", 
-            "variance": "0.00",
-            "variance_percent": "0.0"
-        }
-    
-    def _extract_date_errors(self, analysis_results: Dict[str, Any]) -> List[str]:
+    def _extract_date_errors(self, date_response: str) -> List[str]:
         errors = []
-        date_response = analysis_results.get("date_validation", {}).get("agent_response", "").lower()
         
         if "outside policy period" in date_response:
             errors.append("Claims with loss dates outside policy periods")
@@ -650,9 +673,8 @@ KEY FINDINGS:"""
         
         return errors
     
-    def _extract_duplicate_claims(self, analysis_results: Dict[str, Any]) -> List[str]:
+    def _extract_duplicate_claims(self, duplicate_response: str) -> List[str]:
         duplicates = []
-        duplicate_response = analysis_results.get("duplicate_check", {}).get("agent_response", "").lower()
         
         if "duplicate claim id" in duplicate_response:
             duplicates.append("Duplicate claim IDs found in database")
@@ -661,9 +683,8 @@ KEY FINDINGS:"""
         
         return duplicates
     
-    def _extract_compliance_issues(self, analysis_results: Dict[str, Any]) -> List[str]:
+    def _extract_compliance_issues(self, compliance_response: str) -> List[str]:
         issues = []
-        compliance_response = analysis_results.get("compliance_results", {}).get("agent_response", "").lower()
         
         if "documentation" in compliance_response and "incomplete" in compliance_response:
             issues.append("Incomplete documentation standards")
@@ -672,9 +693,7 @@ KEY FINDINGS:"""
         
         return issues
     
-    def _generate_rationale(self, analysis_results: Dict[str, Any]) -> str:
-        recommendation = analysis_results.get("overall_recommendation", "REVIEW")
-        
+    def _generate_rationale(self, recommendation: str) -> str:
         if recommendation == "APPROVE":
             return "All validation checks passed successfully. No significant issues identified that would prevent claim processing."
         elif recommendation == "REJECT":
@@ -682,9 +701,8 @@ KEY FINDINGS:"""
         else:
             return "Multiple validation concerns identified that require supervisory review before processing can proceed."
     
-    def _generate_next_actions(self, analysis_results: Dict[str, Any]) -> List[str]:
+    def _generate_next_actions(self, recommendation: str) -> List[str]:
         actions = []
-        recommendation = analysis_results.get("overall_recommendation", "REVIEW")
         
         if recommendation == "REJECT":
             actions.extend([
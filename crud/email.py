@@ -1,5 +1,5 @@
 from typing import List, Dict, Any
-from services.email_analyzer import SimpleEmailAnalyzer
+from services.email_analyzer import get_email_analyzer
 from services.gmail_reader import FocusedGmailConnector  # import your Gmail connector class
 from schemas.emails import EmailAnalysisResponse
 from dotenv import load_dotenv
@@ -19,9 +19,6 @@ EMAIL_APP_PASSWORD = os.getenv("EMAIL_APP_PASSWORD")
 if not EMAIL_APP_PASSWORD:
     raise ValueError("EMAIL_APP_PASSWORD environment variable not set")
 
-
-from dataclasses import asdict
-
 async def analyze_emails_from_sender(sender_email: str) -> List[EmailAnalysisResponse]:
     """
     Fetch latest and unread emails from a specific sender,
@@ -32,7 +29,7 @@ async def analyze_emails_from_sender(sender_email: str) -> List[EmailAnalysisRes
     gmail = FocusedGmailConnector(EMAIL_HOST, EMAIL_APP_PASSWORD)
 
     with gmail:
-        analyzer = SimpleEmailAnalyzer(api_key=OPENAI_API_KEY)
+        analyzer = get_email_analyzer(OPENAI_API_KEY)
 
         # Latest email
         latest_email = gmail.read_latest_email_from_sender(sender_email)
@@ -42,7 +39,8 @@ async def analyze_emails_from_sender(sender_email: str) -> List[EmailAnalysisRes
             analysis = analyzer.analyze_email_content(
                 latest_email.subject,
                 latest_email.body_text,
-                latest_email.attachment_filenames
+                latest_email.attachment_filenames,
+                latest_email.sender
             )
             results.append(
                 EmailAnalysisResponse(
@@ -51,18 +49,20 @@ async def analyze_emails_from_sender(sender_email: str) -> List[EmailAnalysisRes
                     date=latest_email.date,
                     body_preview=latest_email.body_text[:200],
                     attachments=latest_email.attachment_filenames,
-                    analysis=asdict(analysis),  # ✅ Convert to dict
+                    analysis=analysis.to_dict(),
                 )
             )
 
         # Unread emails
         unread_emails = gmail.read_unread_emails_from_sender(sender_email)
-        for email_content in unread_emails:
-            analysis = analyzer.analyze_email_content(
-                email_content.subject,
-                email_content.body_text,
-                email_content.attachment_filenames
-            )
+        analyses = analyzer.analyze_emails_batch(
+            [
+                (email_content.subject, email_content.body_text, email_content.attachment_filenames)
+                for email_content in unread_emails
+            ],
+            [email_content.sender for email_content in unread_emails]
+        )
+        for email_content, analysis in zip(unread_emails, analyses):
             results.append(
                 EmailAnalysisResponse(
                     sender=email_content.sender,
@@ -70,7 +70,7 @@ async def analyze_emails_from_sender(sender_email: str) -> List[EmailAnalysisRes
                     date=email_content.date,
                     body_preview=email_content.body_text[:200],
                     attachments=email_content.attachment_filenames,
-                    analysis=asdict(analysis),  # ✅ Convert to dict
+                    analysis=analysis.to_dict(),
                 )
             )
 
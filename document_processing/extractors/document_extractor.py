@@ -1,4 +1,9 @@
 from typing import List, Optional
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+import importlib
+import multiprocessing
+import os
 from langchain.schema import Document
 from ..processors.pdf_processor import PDFProcessor
 from ..processors.excel_processor import ExcelProcessor
@@ -6,6 +11,8 @@ from ..processors.csv_processor import CSVProcessor
 from ..processors.word_processor import WordProcessor
 from ..processors.base import BaseDocumentProcessor
 
+LOAD_DOCUMENTS_NUMBER_OF_THREADS = int(os.getenv("LOAD_DOCUMENTS_NUMBER_OF_THREADS", max((os.cpu_count() or 2) - 1, 1)))
+
 class DocumentExtractor:
     
     def __init__(self):
@@ -26,4 +33,35 @@ class DocumentExtractor:
         processor = self.get_processor(file_path)
         if processor:
             return processor.extract_content(file_path)
-        return []
\ No newline at end of file
+        return []
+
+@lru_cache(maxsize=1)
+def _default_extractor() -> DocumentExtractor:
+    return DocumentExtractor()
+
+def load_single_document(file_path: str) -> List[Document]:
+    return _default_extractor().extract_documents(file_path)
+
+def _warm_up_worker():
+    # Unstructured's Word partitioner imports python-docx and fetches NLTK data on first
+    # import; doing it as the worker starts keeps that off the first .docx it is handed
+    for module_name in ("langchain_community.document_loaders.word_document", "unstructured.partition.docx"):
+        try:
+            importlib.import_module(module_name)
+        except Exception:
+            pass
+
+@lru_cache(maxsize=1)
+def get_loader_pool() -> ProcessPoolExecutor:
+    """Long-lived worker processes for load_single_document, so spawn start-up is paid once"""
+    return ProcessPoolExecutor(
+        max_workers=LOAD_DOCUMENTS_NUMBER_OF_THREADS,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_warm_up_worker
+    )
+
+def warm_loader_pool():
+    """Start every loader worker now, ahead of the first batch of files"""
+    pool = get_loader_pool()
+    for _ in range(LOAD_DOCUMENTS_NUMBER_OF_THREADS):
+        pool.submit(int)
\ No newline at end of file
@@ -1,11 +1,6 @@
-from .claim_parser import ClaimParser
-from .premium_parser import PremiumParser
-from .statement_parser import StatementParser
-from .treaty_parser import TreatyParser
+from .document_parser import DocumentParser, DocumentEnvelope
 
 __all__ = [
-    'ClaimParser',
-    'PremiumParser',
-    'StatementParser',
-    'TreatyParser'
+    'DocumentParser',
+    'DocumentEnvelope'
 ]
\ No newline at end of file
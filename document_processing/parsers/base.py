@@ -0,0 +1,107 @@
+from typing import List, Type
+from functools import lru_cache
+import os
+import time
+import httpx
+from langchain_openai import ChatOpenAI
+from langchain.schema import Document
+from langchain_core.exceptions import OutputParserException
+from langchain_core.runnables import Runnable, RunnableLambda
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from openai import RateLimitError
+from pydantic import BaseModel, ConfigDict, ValidationError
+from .llm_cache import get_llm_cache, make_cache_key
+from .rate_limiter import (
+    LLM_MODEL, LLM_MAX_CONCURRENCY, LLM_MAX_RETRIES, LLM_MAX_OUTPUT_TOKENS, LLM_CHUNK_TOKENS, LLM_CHUNK_OVERLAP_TOKENS,
+    count_tokens, token_bucket, request_rate_limiter
+)
+
+class RecordSchema(BaseModel):
+    """Base for extracted records: immutable, whitespace-trimmed, tolerant of extra keys"""
+    model_config = ConfigDict(frozen=True, extra="ignore", populate_by_name=True, str_strip_whitespace=True)
+
+@lru_cache(maxsize=1)
+def get_http_client() -> httpx.Client:
+    """Process-wide pooled keep-alive HTTP client for OpenAI requests"""
+    return httpx.Client(limits=httpx.Limits(max_connections=100, max_keepalive_connections=100))
+
+def create_llm(api_key: str = None) -> ChatOpenAI:
+    """Build the parser chat model; all instances share one pooled HTTP client"""
+    return ChatOpenAI(
+        model=LLM_MODEL,
+        api_key=api_key or os.getenv("OPENAI_API_KEY"),
+        rate_limiter=request_rate_limiter,
+        max_tokens=LLM_MAX_OUTPUT_TOKENS,
+        http_client=get_http_client()
+    )
+
+_window_splitter = RecursiveCharacterTextSplitter(
+    chunk_size=LLM_CHUNK_TOKENS,
+    chunk_overlap=LLM_CHUNK_OVERLAP_TOKENS,
+    length_function=count_tokens
+)
+
+def split_oversized_documents(documents: List[Document]) -> List[Document]:
+    """Split documents that would overflow the model context into overlapping token windows"""
+    windows = []
+    for doc in documents:
+        if count_tokens(doc.page_content) <= LLM_CHUNK_TOKENS:
+            windows.append(doc)
+        else:
+            windows.extend(_window_splitter.split_documents([doc]))
+    return windows
+
+# A structured call can fail validation inside LangChain's parser as well as ours
+PARSE_ERRORS = (ValidationError, OutputParserException)
+
+def batch_structured_extract(structured_llm: Runnable, model_name: str, prompts: List[str], schema: Type[BaseModel]) -> List[BaseModel]:
+    """Run all prompts concurrently through a model bound with with_structured_output(schema, include_raw=True),
+    serving repeats from the response cache"""
+    if not prompts:
+        return []
+
+    cache = get_llm_cache()
+
+    def extract(prompt: str):
+        key = make_cache_key(model_name, prompt)
+        cached = cache.get(key)
+        if cached is not None:
+            try:
+                return schema.model_validate_json(cached)
+            except ValidationError:
+                pass
+
+        messages = [("human", prompt)]
+        for attempt in range(LLM_MAX_RETRIES + 1):
+            token_bucket.acquire(sum(count_tokens(text) for _, text in messages))
+            content = None
+            try:
+                # Validate the raw text ourselves so a rejected response can be fed back below
+                content = structured_llm.invoke(messages)["raw"].content
+                record = schema.model_validate_json(content)
+            except RateLimitError:
+                if attempt == LLM_MAX_RETRIES:
+                    raise
+                time.sleep(1.0 * (attempt + 1))
+                continue
+            except PARSE_ERRORS as e:
+                if attempt == LLM_MAX_RETRIES:
+                    raise
+                rejected = [("ai", content)] if content else []
+                messages = messages + rejected + [("human", f"Your output had error: {e}. Fix and retry.")]
+                continue
+
+            cache.set(key, content)
+            return record
+
+    outcomes = RunnableLambda(extract).batch(
+        prompts,
+        config={"max_concurrency": LLM_MAX_CONCURRENCY},
+        return_exceptions=True
+    )
+    # Every window runs to completion first so successful answers are cached; then a non-retryable
+    # API error or exhausted retries fail the whole document instead of shrinking its results
+    failures = [outcome for outcome in outcomes if isinstance(outcome, Exception)]
+    if failures:
+        raise failures[0]
+    return outcomes
\ No newline at end of file
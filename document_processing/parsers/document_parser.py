@@ -0,0 +1,79 @@
+from typing import List, Union, Literal
+from langchain_openai import ChatOpenAI
+from langchain.schema import Document
+from pydantic import BaseModel, Field
+from .base import batch_structured_extract, create_llm, split_oversized_documents
+from .claim_parser import ClaimNotificationSchema, CashCallSchema, ClaimBordereauxSchema
+from .premium_parser import PremiumBordereauxSchema
+from .statement_parser import AccountStatementSchema
+from .treaty_parser import TreatyContractSchema
+
+class ClaimNotificationDocument(BaseModel):
+    doc_type: Literal["claim_notification"]
+    record: ClaimNotificationSchema
+
+class CashCallDocument(BaseModel):
+    doc_type: Literal["cash_call"]
+    record: CashCallSchema
+
+class ClaimBordereauxDocument(BaseModel):
+    doc_type: Literal["claim_bordereaux"]
+    record: ClaimBordereauxSchema
+
+class PremiumBordereauxDocument(BaseModel):
+    doc_type: Literal["premium_bordereaux"]
+    record: PremiumBordereauxSchema
+
+class AccountStatementDocument(BaseModel):
+    doc_type: Literal["account_statement"]
+    record: AccountStatementSchema
+
+class TreatyContractDocument(BaseModel):
+    doc_type: Literal["treaty_contract"]
+    record: TreatyContractSchema
+
+class UnknownDocument(BaseModel):
+    doc_type: Literal["unknown"]
+
+# A plain Union of Literal-tagged models is emitted as anyOf, which strict
+# structured output accepts; Field(discriminator=...) would emit oneOf.
+class DocumentEnvelope(BaseModel):
+    document: Union[
+        ClaimNotificationDocument,
+        CashCallDocument,
+        ClaimBordereauxDocument,
+        PremiumBordereauxDocument,
+        AccountStatementDocument,
+        TreatyContractDocument,
+        UnknownDocument
+    ] = Field(description="The detected document type and the record extracted from it")
+
+class DocumentParser:
+    
+    def __init__(self, api_key: str = None, llm: ChatOpenAI = None):
+        self.llm = llm or create_llm(api_key)
+        self._structured_llm = self.llm.with_structured_output(
+            DocumentEnvelope, method="json_schema", strict=True, include_raw=True
+        )
+    
+    def parse_documents(self, documents: List[Document]) -> List[BaseModel]:
+        envelopes = batch_structured_extract(
+            self._structured_llm, self.llm.model_name, self._build_prompts(documents), DocumentEnvelope
+        )
+        return [envelope.document for envelope in envelopes if envelope.document.doc_type != "unknown"]
+    
+    def _build_prompts(self, documents: List[Document]) -> List[str]:
+        return [
+            f"""
+            Identify the type of the following reinsurance document and extract its data.
+            Types: claim_notification (claim number, insured, date of loss), cash_call
+            (claim ID, worksheet, payment partner), claim_bordereaux (transaction dates,
+            paid and outstanding amounts), premium_bordereaux (policy number, gross premium),
+            account_statement (quarterly account, commission, balance), treaty_contract
+            (treaty, reinsured, commission rates). Use unknown if none of these fit.
+            
+            Text content:
+            {doc.page_content}
+            """
+            for doc in split_oversized_documents(documents)
+        ]
\ No newline at end of file
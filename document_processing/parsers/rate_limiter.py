@@ -0,0 +1,59 @@
+import os
+import threading
+import time
+from functools import lru_cache
+import tiktoken
+from langchain_core.rate_limiters import InMemoryRateLimiter
+
+LLM_MODEL = "gpt-4o-mini"
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", 5))
+LLM_REQUESTS_PER_MINUTE = int(os.getenv("LLM_REQUESTS_PER_MINUTE", 500))
+LLM_TOKENS_PER_MINUTE = int(os.getenv("LLM_TOKENS_PER_MINUTE", 200000))
+LLM_MAX_OUTPUT_TOKENS = int(os.getenv("LLM_MAX_OUTPUT_TOKENS", 4096))
+LLM_CHUNK_TOKENS = int(os.getenv("LLM_CHUNK_TOKENS", 80000))
+LLM_CHUNK_OVERLAP_TOKENS = 500
+LLM_MAX_RETRIES = 2
+
+class TokenBucket:
+
+    def __init__(self, tokens_per_minute: int):
+        self.capacity = tokens_per_minute
+        self.available = float(tokens_per_minute)
+        self.refill_per_second = tokens_per_minute / 60.0
+        self.last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: int):
+        tokens = min(tokens, self.capacity)
+
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.available = min(
+                    self.capacity,
+                    self.available + (now - self.last_refill) * self.refill_per_second
+                )
+                self.last_refill = now
+
+                if self.available >= tokens:
+                    self.available -= tokens
+                    return
+
+                wait_seconds = (tokens - self.available) / self.refill_per_second
+
+            time.sleep(wait_seconds)
+
+@lru_cache(maxsize=1)
+def _get_encoding():
+    return tiktoken.encoding_for_model(LLM_MODEL)
+
+def count_tokens(text: str) -> int:
+    return len(_get_encoding().encode(text))
+
+request_rate_limiter = InMemoryRateLimiter(
+    requests_per_second=LLM_REQUESTS_PER_MINUTE / 60.0,
+    check_every_n_seconds=0.1,
+    max_bucket_size=LLM_MAX_CONCURRENCY
+)
+
+token_bucket = TokenBucket(LLM_TOKENS_PER_MINUTE)
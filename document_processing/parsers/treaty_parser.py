@@ -1,11 +1,7 @@
-from typing import List
-from langchain_openai import ChatOpenAI
-from langchain.output_parsers import PydanticOutputParser
-from langchain.schema import Document
-from pydantic import BaseModel, Field
-import os
+from pydantic import Field
+from .base import RecordSchema
 
-class TreatyContractSchema(BaseModel):
+class TreatyContractSchema(RecordSchema):
     treaty_name: str = Field(description="Name of the treaty contract")
     reinsured_name: str = Field(description="Name of the reinsured party")
     treaty_type: str = Field(description="Type of treaty (e.g., Marine Hull and Cargo)")
@@ -16,65 +12,9 @@ class TreatyContractSchema(BaseModel):
     commission_rate: float = Field(description="Commission rate as decimal")
     profit_commission_rate: float = Field(description="Profit commission rate as decimal")
 
-class ReinsurerSchema(BaseModel):
+class ReinsurerSchema(RecordSchema):
     name: str = Field(description="Reinsurer company name")
     country: str = Field(description="Country of the reinsurer")
     share_percentage: float = Field(description="Share percentage as decimal")
     broker_name: str = Field(description="Broker name if applicable")
-    is_statutory: bool = Field(description="Whether this is a statutory reinsurer")
-
-class TreatyParser:
-    
-    def __init__(self, api_key: str = None):
-        self.llm = ChatOpenAI(
-            model="gpt-4o-mini",
-            api_key=api_key or os.getenv("OPENAI_API_KEY")
-        )
-    
-    def parse_treaty_contract(self, documents: List[Document]) -> List[TreatyContractSchema]:
-        parser = PydanticOutputParser(pydantic_object=TreatyContractSchema)
-        results = []
-        
-        for doc in documents:
-            prompt = f"""
-            Extract treaty contract information from the following text.
-            Look for treaty names, parties, periods, commission rates, and contract terms.
-            
-            {parser.get_format_instructions()}
-            
-            Text content:
-            {doc.page_content}
-            """
-            
-            try:
-                response = self.llm.invoke(prompt)
-                record = parser.parse(response.content)
-                results.append(record)
-            except Exception:
-                continue
-        
-        return results
-    
-    def parse_reinsurers(self, documents: List[Document]) -> List[ReinsurerSchema]:
-        parser = PydanticOutputParser(pydantic_object=ReinsurerSchema)
-        results = []
-        
-        for doc in documents:
-            prompt = f"""
-            Extract reinsurer information from the following text.
-            Look for reinsurer names, countries, share percentages, and broker details.
-            
-            {parser.get_format_instructions()}
-            
-            Text content:
-            {doc.page_content}
-            """
-            
-            try:
-                response = self.llm.invoke(prompt)
-                record = parser.parse(response.content)
-                results.append(record)
-            except Exception:
-                continue
-        
-        return results
\ No newline at end of file
+    is_statutory: bool = Field(description="Whether this is a statutory reinsurer")
\ No newline at end of file
@@ -1,13 +1,17 @@
-from typing import List, Dict, Any, Optional
-from sqlalchemy.orm import Session
+from typing import List, Dict, Any, Optional, Tuple
+from collections import defaultdict
+from decimal import Decimal
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+import os
+from sqlalchemy import func, insert, select
+from sqlalchemy.orm import Session, raiseload
 from langchain.schema import Document
 
-from .extractors.document_extractor import DocumentExtractor
-from .parsers.claim_parser import ClaimParser
-from .parsers.premium_parser import PremiumParser
-from .parsers.statement_parser import StatementParser
-from .parsers.treaty_parser import TreatyParser
+from .extractors.document_extractor import get_loader_pool, load_single_document
+from .parsers.base import create_llm
+from .parsers.document_parser import DocumentParser
 
+from models.base import BulkInsertMixin
 from models.processing_batch import ProcessingBatch
 from models.claim_notification import ClaimNotification
 from models.cash_call import CashCall
@@ -19,16 +23,19 @@ from models.treaty_contract import TreatyContract
 from models.reinsurer import Reinsurer
 from models.document_upload import DocumentUpload
 
+PIPELINE_MAX_WORKERS = int(os.getenv("PIPELINE_MAX_WORKERS", os.cpu_count() or 4))
+LOOKUP_CHUNK_SIZE = 500
+
+def _to_decimal(value: Optional[float]) -> Optional[Decimal]:
+    # Via str() so the value is the float's shortest repr, not its exact binary expansion
+    return None if value is None else Decimal(str(value))
 
 class DocumentProcessingPipeline:
     
     def __init__(self, db: Session, api_key: str = None):
         self.db = db
-        self.extractor = DocumentExtractor()
-        self.claim_parser = ClaimParser(api_key)
-        self.premium_parser = PremiumParser(api_key)
-        self.statement_parser = StatementParser(api_key)
-        self.treaty_parser = TreatyParser(api_key)
+        self._llm = create_llm(api_key)
+        self.document_parser = DocumentParser(llm=self._llm)
     
     def process_files(self, file_paths: List[str], batch_id: int) -> Dict[str, Any]:
         results = {
@@ -37,178 +44,212 @@ class DocumentProcessingPipeline:
             "errors": []
         }
         
-        batch = self.db.query(ProcessingBatch).filter(ProcessingBatch.id == batch_id).first()
+        batch = self.db.get(ProcessingBatch, batch_id, options=[raiseload("*")])
         if not batch:
             results["errors"].append(f"Batch {batch_id} not found")
             return results
         
-        for file_path in file_paths:
-            try:
-                documents = self.extractor.extract_documents(file_path)
-                if not documents:
-                    continue
-                
-                doc_upload = self._create_document_upload(file_path, batch_id)
-                self.db.add(doc_upload)
-                self.db.flush()
-                
-                document_type = self._identify_document_type(documents)
-                extracted_data = self._parse_documents(documents, document_type)
-                
-                if extracted_data:
-                    self._store_extracted_data(extracted_data, batch_id, doc_upload.id)
-                    results["extracted_records"][file_path] = len(extracted_data)
-                
-                results["processed_files"] += 1
-                doc_upload.status = "completed"
-                
-            except Exception as e:
-                results["errors"].append(f"Error processing {file_path}: {str(e)}")
-                if 'doc_upload' in locals():
-                    doc_upload.status = "error"
-                    doc_upload.error_message = str(e)
+        loader_pool = get_loader_pool()
+        with ThreadPoolExecutor(max_workers=PIPELINE_MAX_WORKERS) as executor:
+            extractions = {
+                loader_pool.submit(load_single_document, file_path): file_path
+                for file_path in file_paths
+            }
+            
+            # One loop over both kinds of future: a file is parsed as soon as its extraction
+            # finishes and stored as soon as its parse does, while slow OCR files keep loading
+            parses = {}
+            pending = set(extractions)
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future in extractions:
+                        parse = executor.submit(self._parse_extracted, future)
+                        parses[parse] = extractions[future]
+                        pending.add(parse)
+                    else:
+                        self._store_parsed(parses[future], future, batch_id, results)
         
+        self._update_batch_totals(batch)
         self.db.commit()
         return results
     
-    def _identify_document_type(self, documents: List[Document]) -> str:
-        content = " ".join([doc.page_content for doc in documents]).lower()
+    def _store_parsed(self, file_path: str, parse: Future, batch_id: int, results: Dict[str, Any]):
+        doc_upload = None
+        try:
+            documents, extracted_data = parse.result()
+            if not documents:
+                return
+            
+            doc_upload = self._create_document_upload(file_path, batch_id)
+            self.db.add(doc_upload)
+            
+            if isinstance(extracted_data, Exception):
+                raise extracted_data
+            
+            if extracted_data:
+                self._store_extracted_data(extracted_data, batch_id)
+                results["extracted_records"][file_path] = len(extracted_data)
+            
+            results["processed_files"] += 1
+            doc_upload.status = "completed"
+            
+        except Exception as e:
+            results["errors"].append(f"Error processing {file_path}: {str(e)}")
+            if doc_upload is not None:
+                doc_upload.status = "error"
+                doc_upload.error_message = str(e)
+    
+    def _parse_extracted(self, extraction: Future) -> Tuple[List[Document], Any]:
+        documents = extraction.result()
+        if not documents:
+            return documents, []
         
-        if any(term in content for term in ["claim notification", "claim number", "date of loss", "insured name"]):
-            return "claim_notification"
-        elif any(term in content for term in ["cash call", "worksheet", "claim_id", "payment partner"]):
-            return "cash_call"
-        elif any(term in content for term in ["bordereaux", "transaction date", "paid amount", "outstanding"]):
-            return "claim_bordereaux"
-        elif any(term in content for term in ["premium bordereaux", "policy number", "gross premium"]):
-            return "premium_bordereaux"
-        elif any(term in content for term in ["account statement", "quarterly", "commission", "balance"]):
-            return "account_statement"
-        elif any(term in content for term in ["treaty", "reinsured", "commission rate", "profit commission"]):
-            return "treaty_contract"
-        else:
-            return "unknown"
+        try:
+            return documents, self.document_parser.parse_documents(documents)
+        except Exception as e:
+            return documents, e
     
-    def _parse_documents(self, documents: List[Document], document_type: str) -> List[Any]:
-        if document_type == "claim_notification":
-            return self.claim_parser.parse_claim_notification(documents)
-        elif document_type == "cash_call":
-            return self.claim_parser.parse_cash_calls(documents)
-        elif document_type == "claim_bordereaux":
-            return self.claim_parser.parse_claim_bordereaux(documents)
-        elif document_type == "premium_bordereaux":
-            return self.premium_parser.parse_premium_bordereaux(documents)
-        elif document_type == "account_statement":
-            return self.statement_parser.parse_account_statement(documents)
-        elif document_type == "treaty_contract":
-            return self.treaty_parser.parse_treaty_contract(documents)
-        else:
-            return []
+    def _update_batch_totals(self, batch: ProcessingBatch):
+        # Aggregated by the database so no amount is fetched back as a Python Decimal
+        batch.claims_count, batch.total_claims_amount = self.db.execute(
+            select(func.count(), func.sum(ClaimNotification.gross_claim_amount))
+            .where(ClaimNotification.batch_id == batch.id)
+        ).one()
+        batch.premiums_count, batch.total_premiums_amount = self.db.execute(
+            select(func.count(), func.sum(PremiumBordereaux.gross_premium))
+            .where(PremiumBordereaux.batch_id == batch.id)
+        ).one()
     
-    def _store_extracted_data(self, data: List[Any], batch_id: int, doc_upload_id: int):
-        for record in data:
-            if hasattr(record, 'claim_number'):
-                self._store_claim_notification(record, batch_id)
-            elif hasattr(record, 'claim_id'):
-                self._store_cash_call(record, batch_id)
-            elif hasattr(record, 'transaction_date'):
-                self._store_claim_bordereaux(record, batch_id)
-            elif hasattr(record, 'policy_number'):
-                self._store_premium_bordereaux(record, batch_id)
-            elif hasattr(record, 'account_period'):
-                self._store_account_statement(record, batch_id)
-            elif hasattr(record, 'treaty_name'):
-                self._store_treaty_contract(record, batch_id)
+    def _store_extracted_data(self, data: List[Any], batch_id: int):
+        records_by_type = defaultdict(list)
+        for document in data:
+            records_by_type[document.doc_type].append(document.record)
+        
+        # Claim notifications go first so bordereaux rows in the same file can link to them
+        row_builders = [
+            ("claim_notification", ClaimNotification, self._claim_notification_rows),
+            ("cash_call", CashCall, self._cash_call_rows),
+            ("claim_bordereaux", ClaimBordereaux, self._claim_bordereaux_rows),
+            ("premium_bordereaux", PremiumBordereaux, self._premium_bordereaux_rows),
+            ("account_statement", AccountStatement, self._account_statement_rows),
+            ("treaty_contract", TreatyContract, self._treaty_contract_rows)
+        ]
+        
+        for doc_type, model, build_rows in row_builders:
+            records = records_by_type.get(doc_type)
+            if not records:
+                continue
+            if issubclass(model, BulkInsertMixin):
+                model.bulk_insert(self.db, build_rows(records, batch_id))
+            else:
+                self.db.execute(insert(model), build_rows(records, batch_id))
     
-    def _store_claim_notification(self, record, batch_id: int):
-        claim = ClaimNotification(
-            claim_number=record.claim_number,
-            policy_number=record.policy_number,
-            insured_name=record.insured_name,
-            date_of_loss=record.date_of_loss,
-            notification_date=record.notification_date,
-            sum_insured=record.sum_insured,
-            gross_claim_amount=record.gross_claim_amount,
-            claim_type=record.claim_type,
-            class_code=record.class_code,
-            batch_id=batch_id
-        )
-        self.db.add(claim)
+    def _claim_notification_rows(self, records: List[Any], batch_id: int) -> List[Dict[str, Any]]:
+        return [
+            {
+                "claim_number": record.claim_number,
+                "policy_number": record.policy_number,
+                "insured_name": record.insured_name,
+                "date_of_loss": record.date_of_loss,
+                "notification_date": record.notification_date,
+                "sum_insured": _to_decimal(record.sum_insured),
+                "gross_claim_amount": _to_decimal(record.gross_claim_amount),
+                "claim_type": record.claim_type,
+                "class_code": record.class_code,
+                "batch_id": batch_id
+            }
+            for record in records
+        ]
     
-    def _store_cash_call(self, record, batch_id: int):
-        cash_call = CashCall(
-            claim_id=record.claim_id,
-            worksheet_id=record.worksheet_id,
-            business_id=record.business_id,
-            claim_name=record.claim_name,
-            date_of_loss=record.date_of_loss,
-            currency_code=record.currency_code,
-            amount_original=record.amount_original,
-            payment_partner_name=record.payment_partner_name,
-            batch_id=batch_id
-        )
-        self.db.add(cash_call)
+    def _cash_call_rows(self, records: List[Any], batch_id: int) -> List[Dict[str, Any]]:
+        return [
+            {
+                "claim_id": record.claim_id,
+                "worksheet_id": record.worksheet_id,
+                "business_id": record.business_id,
+                "claim_name": record.claim_name,
+                "date_of_loss": record.date_of_loss,
+                "currency_code": record.currency_code,
+                "amount_original": _to_decimal(record.amount_original),
+                "payment_partner_name": record.payment_partner_name,
+                "batch_id": batch_id
+            }
+            for record in records
+        ]
     
-    def _store_claim_bordereaux(self, record, batch_id: int):
-        claim_notification = self.db.query(ClaimNotification).filter(
-            ClaimNotification.claim_number == record.claim_number
-        ).first()
+    def _claim_bordereaux_rows(self, records: List[Any], batch_id: int) -> List[Dict[str, Any]]:
+        claim_numbers = list({record.claim_number for record in records})
+        notification_ids = {}
+        for start in range(0, len(claim_numbers), LOOKUP_CHUNK_SIZE):
+            notification_ids.update(self.db.execute(
+                select(ClaimNotification.claim_number, ClaimNotification.id)
+                .where(ClaimNotification.claim_number.in_(claim_numbers[start:start + LOOKUP_CHUNK_SIZE]))
+            ).all())
         
-        bordereaux = ClaimBordereaux(
-            notification_id=claim_notification.id if claim_notification else None,
-            transaction_date=record.transaction_date,
-            transaction_type=record.transaction_type,
-            paid_amount=record.paid_amount,
-            outstanding_amount=record.outstanding_amount,
-            batch_id=batch_id
-        )
-        self.db.add(bordereaux)
+        return [
+            {
+                "notification_id": notification_ids.get(record.claim_number),
+                "transaction_date": record.transaction_date,
+                "transaction_type": record.transaction_type,
+                "paid_amount": _to_decimal(record.paid_amount),
+                "outstanding_amount": _to_decimal(record.outstanding_amount),
+                "batch_id": batch_id
+            }
+            for record in records
+        ]
     
-    def _store_premium_bordereaux(self, record, batch_id: int):
-        premium = PremiumBordereaux(
-            policy_number=record.policy_number,
-            insured_name=record.insured_name,
-            period_from=record.period_from,
-            period_to=record.period_to,
-            sum_insured=record.sum_insured,
-            gross_premium=record.gross_premium,
-            ri_premium=record.ri_premium,
-            retention_premium=record.retention_premium,
-            underwriting_year=record.underwriting_year,
-            batch_id=batch_id
-        )
-        self.db.add(premium)
+    def _premium_bordereaux_rows(self, records: List[Any], batch_id: int) -> List[Dict[str, Any]]:
+        return [
+            {
+                "policy_number": record.policy_number,
+                "insured_name": record.insured_name,
+                "period_from": record.period_from,
+                "period_to": record.period_to,
+                "sum_insured": _to_decimal(record.sum_insured),
+                "gross_premium": _to_decimal(record.gross_premium),
+                "ri_premium": _to_decimal(record.ri_premium),
+                "retention_premium": _to_decimal(record.retention_premium),
+                "underwriting_year": record.underwriting_year,
+                "batch_id": batch_id
+            }
+            for record in records
+        ]
     
-    def _store_account_statement(self, record, batch_id: int):
-        statement = AccountStatement(
-            account_period=record.account_period,
-            underwriting_year=record.underwriting_year,
-            currency=record.currency,
-            cargo_premium=record.cargo_premium,
-            hull_premium=record.hull_premium,
-            total_income=record.total_income,
-            commission_rate=record.commission_rate,
-            commission_amount=record.commission_amount,
-            claims_paid=record.claims_paid,
-            outstanding_claims=record.outstanding_claims,
-            balance=record.balance,
-            batch_id=batch_id
-        )
-        self.db.add(statement)
+    def _account_statement_rows(self, records: List[Any], batch_id: int) -> List[Dict[str, Any]]:
+        return [
+            {
+                "account_period": record.account_period,
+                "underwriting_year": record.underwriting_year,
+                "currency": record.currency,
+                "cargo_premium": _to_decimal(record.cargo_premium),
+                "hull_premium": _to_decimal(record.hull_premium),
+                "total_income": _to_decimal(record.total_income),
+                "commission_rate": _to_decimal(record.commission_rate),
+                "commission_amount": _to_decimal(record.commission_amount),
+                "claims_paid": _to_decimal(record.claims_paid),
+                "outstanding_claims": _to_decimal(record.outstanding_claims),
+                "balance": _to_decimal(record.balance),
+                "batch_id": batch_id
+            }
+            for record in records
+        ]
     
-    def _store_treaty_contract(self, record, batch_id: int):
-        treaty = TreatyContract(
-            treaty_name=record.treaty_name,
-            reinsured_name=record.reinsured_name,
-            treaty_type=record.treaty_type,
-            underwriting_year=record.underwriting_year,
-            period_from=record.period_from,
-            period_to=record.period_to,
-            currency=record.currency,
-            commission_rate=record.commission_rate,
-            profit_commission_rate=record.profit_commission_rate
-        )
-        self.db.add(treaty)
+    def _treaty_contract_rows(self, records: List[Any], batch_id: int) -> List[Dict[str, Any]]:
+        return [
+            {
+                "treaty_name": record.treaty_name,
+                "reinsured_name": record.reinsured_name,
+                "treaty_type": record.treaty_type,
+                "underwriting_year": record.underwriting_year,
+                "period_from": record.period_from,
+                "period_to": record.period_to,
+                "currency": record.currency,
+                "commission_rate": _to_decimal(record.commission_rate),
+                "profit_commission_rate": _to_decimal(record.profit_commission_rate)
+            }
+            for record in records
+        ]
     
     def _create_document_upload(self, file_path: str, batch_id: int) -> DocumentUpload:
         from pathlib import Path
@@ -18,9 +18,17 @@ class BaseDocumentProcessor(ABC):
     
     def get_metadata(self, file_path: str) -> Dict[str, Any]:
         path = Path(file_path)
+        # One stat() per file; attach_metadata shares the result across all its documents
+        stat = path.stat()
         return {
             "filename": path.name,
             "file_type": path.suffix.lower(),
-            "file_size": path.stat().st_size,
+            "file_size": stat.st_size,
             "source": str(path)
-        }
\ No newline at end of file
+        }
+    
+    def attach_metadata(self, documents: List[Document], file_path: str) -> List[Document]:
+        metadata = self.get_metadata(file_path)
+        for doc in documents:
+            doc.metadata.update(metadata)
+        return documents
\ No newline at end of file
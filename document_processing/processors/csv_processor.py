@@ -1,7 +1,8 @@
 from typing import List
 from langchain.schema import Document
-from langchain_community.document_loaders import CSVLoader
-import pandas as pd
+from pathlib import Path
+import csv
+import io
 from .base import BaseDocumentProcessor
 
 class CSVProcessor(BaseDocumentProcessor):
@@ -11,21 +12,21 @@ class CSVProcessor(BaseDocumentProcessor):
     
     def extract_content(self, file_path: str) -> List[Document]:
         try:
-            df = pd.read_csv(file_path)
-            content = df.to_string(index=False)
+            content = Path(file_path).read_text(encoding="utf-8")
+            
+            reader = csv.reader(io.StringIO(content))
+            headers = next(reader, [])
+            row_count = sum(1 for _ in reader)
             
             metadata = self.get_metadata(file_path)
-            metadata['rows'] = len(df)
-            metadata['columns'] = len(df.columns)
-            metadata['headers'] = list(df.columns)
+            metadata['rows'] = row_count
+            metadata['columns'] = len(headers)
+            metadata['headers'] = headers
             
             return [Document(page_content=content, metadata=metadata)]
             
         except Exception:
-            loader = CSVLoader(file_path)
-            documents = loader.load()
+            from langchain_community.document_loaders import CSVLoader
             
-            for doc in documents:
-                doc.metadata.update(self.get_metadata(file_path))
-            
-            return documents
\ No newline at end of file
+            loader = CSVLoader(file_path)
+            return self.attach_metadata(loader.load(), file_path)
\ No newline at end of file
@@ -1,7 +1,7 @@
 from typing import List
 from langchain.schema import Document
-from langchain_community.document_loaders import UnstructuredExcelLoader
-import pandas as pd
+import io
+import openpyxl
 from .base import BaseDocumentProcessor
 
 class ExcelProcessor(BaseDocumentProcessor):
@@ -13,30 +13,38 @@ class ExcelProcessor(BaseDocumentProcessor):
         documents = []
         
         try:
-            excel_file = pd.ExcelFile(file_path)
+            workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+            file_metadata = self.get_metadata(file_path)
             
-            for sheet_name in excel_file.sheet_names:
-                df = pd.read_excel(file_path, sheet_name=sheet_name)
-                content = df.to_string(index=False)
-                
-                metadata = self.get_metadata(file_path)
-                metadata['sheet_name'] = sheet_name
-                metadata['rows'] = len(df)
-                metadata['columns'] = len(df.columns)
-                
-                doc = Document(
-                    page_content=content,
-                    metadata=metadata
-                )
-                documents.append(doc)
+            try:
+                for sheet in workbook.worksheets:
+                    buffer = io.StringIO()
+                    row_count = 0
+                    column_count = 0
+                    
+                    for row in sheet.iter_rows(values_only=True):
+                        buffer.write("\t".join("" if value is None else str(value) for value in row))
+                        buffer.write("\n")
+                        row_count += 1
+                        column_count = max(column_count, len(row))
+                    
+                    metadata = dict(file_metadata)
+                    metadata['sheet_name'] = sheet.title
+                    metadata['rows'] = max(row_count - 1, 0)
+                    metadata['columns'] = column_count
+                    
+                    doc = Document(
+                        page_content=buffer.getvalue(),
+                        metadata=metadata
+                    )
+                    documents.append(doc)
+            finally:
+                workbook.close()
             
             return documents
             
         except Exception:
-            loader = UnstructuredExcelLoader(file_path)
-            documents = loader.load()
-            
-            for doc in documents:
-                doc.metadata.update(self.get_metadata(file_path))
+            from langchain_community.document_loaders import UnstructuredExcelLoader
             
-            return documents
\ No newline at end of file
+            loader = UnstructuredExcelLoader(file_path)
+            return self.attach_metadata(loader.load(), file_path)
\ No newline at end of file
@@ -0,0 +1,44 @@
+from collections import Counter
+from pathlib import Path
+import re
+import ahocorasick
+
+PAGE_TYPE_KEYWORDS = [
+    ("claims_bordereaux", ["bordereaux", "claim number", "transaction date", "paid amount", "outstanding"]),
+    ("cedant_statement", ["statement", "quarterly", "account", "balance", "commission", "total income"]),
+    ("claim_notification", ["notification", "claim notification", "insured name", "date of loss"]),
+    ("treaty_contract", ["treaty", "reinsured", "commission rate", "profit commission"])
+]
+
+def _build_automaton() -> ahocorasick.Automaton:
+    automaton = ahocorasick.Automaton()
+    for priority, (_, keywords) in enumerate(PAGE_TYPE_KEYWORDS):
+        for keyword in keywords:
+            automaton.add_word(keyword, priority)
+    automaton.make_automaton()
+    return automaton
+
+_AUTOMATON = _build_automaton()
+
+# Filenames only decide the type when they name exactly one of these
+FILENAME_TYPE_PATTERNS = [
+    ("claims_bordereaux", re.compile(r"bordereau|\bbdx\b")),
+    ("cedant_statement", re.compile(r"statement")),
+    ("claim_notification", re.compile(r"notification")),
+    ("treaty_contract", re.compile(r"treaty"))
+]
+
+def classify_page_content(content: str) -> str:
+    """Classify a page by keyword hit count in a single pass; earlier types in PAGE_TYPE_KEYWORDS win ties"""
+    scores = Counter(priority for _, priority in _AUTOMATON.iter(content.lower()))
+    if not scores:
+        return "unknown"
+    
+    best = max(scores, key=lambda priority: (scores[priority], -priority))
+    return PAGE_TYPE_KEYWORDS[best][0]
+
+def classify_filename(file_path: str) -> str:
+    """Classify a file from its name alone; "unknown" when it names no type or more than one"""
+    name = Path(file_path).stem.lower().replace("_", " ")
+    matches = [doc_type for doc_type, pattern in FILENAME_TYPE_PATTERNS if pattern.search(name)]
+    return matches[0] if len(matches) == 1 else "unknown"
\ No newline at end of file
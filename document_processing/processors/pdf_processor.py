@@ -1,9 +1,13 @@
-from typing import List
+from typing import Iterator, List
 from langchain.schema import Document
-from langchain_community.document_loaders import PyPDFLoader, UnstructuredPDFLoader
 from .base import BaseDocumentProcessor
+from .page_classifier import classify_filename, classify_page_content
 import fitz
 
+MIN_TEXT_CHARS_PER_PAGE = 20
+# Plain text only: no image blocks, hyphenated line breaks rejoined
+PDF_TEXT_FLAGS = fitz.TEXTFLAGS_TEXT | fitz.TEXT_DEHYPHENATE
+
 class PDFProcessor(BaseDocumentProcessor):
     
     def can_process(self, file_path: str) -> bool:
@@ -11,64 +15,67 @@ class PDFProcessor(BaseDocumentProcessor):
     
     def extract_content(self, file_path: str) -> List[Document]:
         try:
-            documents = []
-            pdf_doc = fitz.open(file_path)
-            
-            for page_num in range(len(pdf_doc)):
-                page = pdf_doc[page_num]
-                page_text = page.get_text()
-                
-                page_metadata = self.get_metadata(file_path)
-                page_metadata.update({
-                    'page_number': page_num + 1,
-                    'total_pages': len(pdf_doc),
-                    'document_type': self._classify_page_content(page_text),
-                    'page_content_length': len(page_text)
-                })
-                
-                doc = Document(
-                    page_content=page_text,
-                    metadata=page_metadata
-                )
-                documents.append(doc)
-            
-            pdf_doc.close()
-            return documents
-            
+            documents = self._extract_with_pymupdf(file_path)
         except Exception:
+            # PyMuPDF rejected the file; pdfium is as fast and tolerates other breakage
             try:
-                loader = PyPDFLoader(file_path)
-                documents = loader.load()
-                
-                for i, doc in enumerate(documents):
-                    doc.metadata.update(self.get_metadata(file_path))
-                    doc.metadata.update({
-                        'page_number': i + 1,
-                        'document_type': self._classify_page_content(doc.page_content)
-                    })
-                
-                return documents
-                
+                documents = self._extract_with_pdfium(file_path)
             except Exception:
-                loader = UnstructuredPDFLoader(file_path)
-                documents = loader.load()
-                
-                for doc in documents:
-                    doc.metadata.update(self.get_metadata(file_path))
-                    doc.metadata['document_type'] = self._classify_page_content(doc.page_content)
-                
-                return documents
+                documents = []
+        
+        text_chars = sum(len(doc.page_content.strip()) for doc in documents)
+        if documents and text_chars >= MIN_TEXT_CHARS_PER_PAGE * len(documents):
+            return documents
+        
+        # No usable text layer (scanned or unreadable PDF): fall back to Unstructured's OCR
+        from langchain_community.document_loaders import UnstructuredPDFLoader
+        
+        loader = UnstructuredPDFLoader(file_path)
+        documents = self.attach_metadata(loader.load(), file_path)
+        
+        filename_type = classify_filename(file_path)
+        for doc in documents:
+            doc.metadata['document_type'] = (
+                filename_type if filename_type != "unknown" else classify_page_content(doc.page_content)
+            )
+        
+        return documents
+    
+    def _extract_with_pymupdf(self, file_path: str) -> List[Document]:
+        return list(self._iter_pages(file_path))
     
-    def _classify_page_content(self, content: str) -> str:
-        content_lower = content.lower()
+    def _extract_with_pdfium(self, file_path: str) -> List[Document]:
+        import pypdfium2
         
-        if any(term in content_lower for term in ["bordereaux", "claim number", "transaction date", "paid amount", "outstanding"]):
-            return "claims_bordereaux"
-        elif any(term in content_lower for term in ["statement", "quarterly", "account", "balance", "commission", "total income"]):
-            return "cedant_statement"
-        elif any(term in content_lower for term in ["notification", "claim notification", "insured name", "date of loss"]):
-            return "claim_notification"
-        elif any(term in content_lower for term in ["treaty", "reinsured", "commission rate", "profit commission"]):
-            return "treaty_contract"
-        else:
-            return "unknown"
\ No newline at end of file
+        pdf_doc = pypdfium2.PdfDocument(file_path)
+        try:
+            page_texts = (page.get_textpage().get_text_range() for page in pdf_doc)
+            return list(self._iter_documents(file_path, len(pdf_doc), page_texts))
+        finally:
+            pdf_doc.close()
+    
+    def _iter_pages(self, file_path: str) -> Iterator[Document]:
+        """Yield one Document per page, extracting text only as each page is consumed"""
+        # Runs inside a loader pool worker, so files, not pages, are what go in parallel
+        with fitz.open(file_path) as pdf_doc:
+            page_texts = (page.get_text("text", flags=PDF_TEXT_FLAGS) for page in pdf_doc)
+            yield from self._iter_documents(file_path, len(pdf_doc), page_texts)
+    
+    def _iter_documents(self, file_path: str, total_pages: int, page_texts: Iterator[str]) -> Iterator[Document]:
+        file_metadata = self.get_metadata(file_path)
+        # A filename that names the type settles every page without keyword scans
+        filename_type = classify_filename(file_path)
+        
+        for page_num, page_text in enumerate(page_texts):
+            page_metadata = dict(file_metadata)
+            page_metadata.update({
+                'page_number': page_num + 1,
+                'total_pages': total_pages,
+                'document_type': filename_type if filename_type != "unknown" else classify_page_content(page_text),
+                'page_content_length': len(page_text)
+            })
+            
+            yield Document(
+                page_content=page_text,
+                metadata=page_metadata
+            )
\ No newline at end of file
@@ -1,6 +1,5 @@
 from typing import List
 from langchain.schema import Document
-from langchain_community.document_loaders import UnstructuredWordDocumentLoader
 from .base import BaseDocumentProcessor
 
 class WordProcessor(BaseDocumentProcessor):
@@ -9,10 +8,7 @@ class WordProcessor(BaseDocumentProcessor):
         return self.get_file_extension(file_path) in ['.docx', '.doc']
     
     def extract_content(self, file_path: str) -> List[Document]:
-        loader = UnstructuredWordDocumentLoader(file_path)
-        documents = loader.load()
-        
-        for doc in documents:
-            doc.metadata.update(self.get_metadata(file_path))
+        from langchain_community.document_loaders import UnstructuredWordDocumentLoader
         
-        return documents
\ No newline at end of file
+        loader = UnstructuredWordDocumentLoader(file_path)
+        return self.attach_metadata(loader.load(), file_path)
\ No newline at end of file
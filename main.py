@@ -2,9 +2,7 @@ import asyncio
 import logging
 import os
 from dotenv import load_dotenv
-from websocket_server import start_websocket_server
 from pipeline_controller import ClaimsProcessingPipeline
-from websocket_manager import websocket_manager
 
 load_dotenv()
 
@@ -57,7 +55,12 @@ async def run_standalone_processing():
         logger.error(f"Standalone processing error: {e}")
 
 async def run_websocket_server():
+    # Imported here so standalone runs skip the websocket stack and its module-level pipeline
+    from websocket_server import start_websocket_server
+    from document_processing.extractors.document_extractor import warm_loader_pool
+    
     logger.info("Starting WebSocket server mode")
+    warm_loader_pool()
     await start_websocket_server(
         host=os.getenv("WEBSOCKET_HOST", "localhost"),
         port=int(os.getenv("WEBSOCKET_PORT", 8765))
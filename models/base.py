@@ -1,6 +1,58 @@
-from sqlalchemy import Column, Integer, String, Date, DateTime, Boolean, Text, ForeignKey, Numeric
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import relationship
-from datetime import datetime
+from sqlalchemy import Column, Integer, String, Date, DateTime, Boolean, Text, ForeignKey, Numeric, insert
+from sqlalchemy.orm import declarative_base, relationship
+from datetime import date, datetime
+from typing import Any, Dict, List
+import io
 
-Base = declarative_base()
\ No newline at end of file
+Base = declarative_base()
+
+def _copy_value(value: Any) -> str:
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+class BulkInsertMixin:
+    """Bulk ingestion for high-volume tables: COPY on PostgreSQL, chunked executemany elsewhere"""
+    
+    @classmethod
+    def bulk_insert(cls, session, mappings: List[Dict[str, Any]], chunk_size: int = 10_000):
+        if not mappings:
+            return
+        
+        if session.get_bind().dialect.name != "postgresql":
+            for start in range(0, len(mappings), chunk_size):
+                session.execute(insert(cls), mappings[start:start + chunk_size])
+            return
+        
+        # COPY skips Python-side column defaults, so fill those in here
+        defaults = {
+            column.name: column.default.arg(None) if column.default.is_callable else column.default.arg
+            for column in cls.__table__.columns
+            if column.default is not None
+            and (column.default.is_scalar or column.default.is_callable)
+            and column.name not in mappings[0]
+        }
+        columns = list(mappings[0]) + list(defaults)
+        
+        cursor = session.connection().connection.cursor()
+        try:
+            for start in range(0, len(mappings), chunk_size):
+                buffer = io.StringIO()
+                for mapping in mappings[start:start + chunk_size]:
+                    row = [mapping.get(name) for name in mappings[0]] + list(defaults.values())
+                    buffer.write("\t".join(_copy_value(value) for value in row))
+                    buffer.write("\n")
+                buffer.seek(0)
+                cursor.copy_from(buffer, cls.__tablename__, sep="\t", columns=columns)
+        finally:
+            cursor.close()
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, ForeignKey, Integer, String, Numeric, Date, DateTime, Text
+from sqlalchemy import Column, ForeignKey, Index, Integer, String, Numeric, Date, DateTime, Text
 from sqlalchemy.orm import relationship
 from .base import Base
 from datetime import datetime
@@ -6,6 +6,10 @@ from datetime import datetime
 class CashCall(Base):
     """Cash calls processed for claim validation"""
     __tablename__ = 'cash_calls'
+    __table_args__ = (
+        Index('ix_cashcall_claim_dol', 'claim_id', 'date_of_loss'),
+        Index('ix_cashcall_wsid', 'worksheet_id'),
+    )
     
     id = Column(Integer, primary_key=True)
 
@@ -13,7 +17,7 @@ class CashCall(Base):
 
     
     # Core identifiers
-    claim_id = Column(String(20), nullable=False, index=True)  # e.g., "0000054954"
+    claim_id = Column(String(20), nullable=False)  # e.g., "0000054954"
     worksheet_id = Column(String(20), nullable=False)  # e.g., "CW71051"
     business_id = Column(String(20), nullable=False)  # e.g., "PTTY830"
     
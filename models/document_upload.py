@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from .base import Base
 from datetime import datetime
@@ -6,6 +6,9 @@ from datetime import datetime
 class DocumentUpload(Base):
     """Track uploaded documents for processing"""
     __tablename__ = 'document_uploads'
+    __table_args__ = (
+        Index('ix_docupload_batch', 'batch_id'),
+    )
     
     id = Column(Integer, primary_key=True)
     batch_id = Column(Integer, ForeignKey('processing_batches.id'), nullable=True)
@@ -1,11 +1,16 @@
-from sqlalchemy import Column, ForeignKey, Integer, String, Numeric, Date, DateTime
+from sqlalchemy import Column, ForeignKey, Index, Integer, String, Numeric, Date, DateTime
 from sqlalchemy.orm import relationship
-from .base import Base
+from .base import Base, BulkInsertMixin
 from datetime import datetime
 
-class PremiumBordereaux(Base):
+class PremiumBordereaux(BulkInsertMixin, Base):
     """Premium bordereaux entries"""
     __tablename__ = 'premium_bordereaux'
+    __table_args__ = (
+        Index('ix_premium_policy_uwy', 'policy_number', 'underwriting_year'),
+        Index('ix_premium_dn_number', 'dn_number'),
+        Index('ix_premium_batch_policy', 'batch_id', 'policy_number'),
+    )
     
     id = Column(Integer, primary_key=True)
     batch_id = Column(Integer, ForeignKey('processing_batches.id'), nullable=True)
@@ -40,4 +45,4 @@ class PremiumBordereaux(Base):
     
     created_at = Column(DateTime, default=datetime.utcnow)
 
-    batch = relationship("ProcessingBatch", backref="premium_bordereaux")
+    batch = relationship("ProcessingBatch", back_populates="premium_bordereaux")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, Numeric
+from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, Numeric, Index, text
 from sqlalchemy.orm import relationship
 from .base import Base
 from datetime import datetime
@@ -6,6 +6,13 @@ from datetime import datetime
 class ProcessingBatch(Base):
     """Core model to track each email processing batch"""
     __tablename__ = 'processing_batches'
+    __table_args__ = (
+        # Partial on PostgreSQL: only batches still in flight, which is what status polling reads
+        Index(
+            'ix_batch_active_status', 'status', 'email_received_date',
+            postgresql_where=text("status NOT IN ('completed', 'completed_with_errors', 'failed')")
+        ),
+    )
     
     id = Column(Integer, primary_key=True)
     
@@ -45,6 +52,10 @@ class ProcessingBatch(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     processed_by = Column(String(100))
+    
+    # Can run to thousands of rows per batch: load with selectinload() where needed
+    premium_bordereaux = relationship("PremiumBordereaux", back_populates="batch")
+    validation_errors = relationship("ValidationError", back_populates="batch")
    
     
     @property
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from .base import Base
 from datetime import datetime
@@ -6,6 +6,9 @@ from datetime import datetime
 class ValidationError(Base):
     """Track validation errors during processing"""
     __tablename__ = 'validation_errors'
+    __table_args__ = (
+        Index('ix_validation_batch_severity', 'batch_id', 'severity', 'resolved'),
+    )
     
     id = Column(Integer, primary_key=True)
     document_id = Column(Integer, ForeignKey('document_uploads.id'))
@@ -26,4 +29,4 @@ class ValidationError(Base):
     
     document = relationship("DocumentUpload", backref="validation_errors")
 
-    batch = relationship("ProcessingBatch", backref="validation_errors")
+    batch = relationship("ProcessingBatch", back_populates="validation_errors")
@@ -1,17 +1,29 @@
 import asyncio
 import logging
+import os
+from collections import Counter, deque
 from typing import Dict, Any, Optional, List
 from datetime import datetime
 import uuid
 from agents.master_agent import MasterClaimsAgent
 from websocket_manager import WebSocketManager
 
+PROCESSING_HISTORY_LIMIT = int(os.getenv("PROCESSING_HISTORY_LIMIT", 10_000))
+MAX_CONCURRENT_RUNS = int(os.getenv("MAX_CONCURRENT_RUNS", 4))
+
 class ClaimsProcessingPipeline:
     
     def __init__(self, websocket_manager: Optional[WebSocketManager] = None):
         self.websocket_manager = websocket_manager
         self.active_agents: Dict[str, MasterClaimsAgent] = {}
-        self.processing_history = []
+        self.processing_history = deque(maxlen=PROCESSING_HISTORY_LIMIT)
+        # Running totals so stats stay O(1) and cover runs that have aged out of the history
+        self._successful = 0
+        self._failed = 0
+        self._duration_sum = 0.0
+        self._duration_count = 0
+        self._recommendation_counts = Counter()
+        self._run_slots = asyncio.Semaphore(MAX_CONCURRENT_RUNS)
         self.logger = logging.getLogger(__name__)
     
     async def start_processing(self, sender_email: str = "Maundu@kenyare.co.ke") -> Dict[str, Any]:
@@ -45,7 +57,7 @@ class ClaimsProcessingPipeline:
                 "report_path": results.get("report_generated", {}).get("pdf_path")
             }
             
-            self.processing_history.append(processing_record)
+            self._record(processing_record)
             
             if agent_id in self.active_agents:
                 del self.active_agents[agent_id]
@@ -76,7 +88,7 @@ class ClaimsProcessingPipeline:
                 "error": error_msg
             }
             
-            self.processing_history.append(processing_record)
+            self._record(processing_record)
             
             if self.websocket_manager:
                 await self.websocket_manager.broadcast(f"Claims processing failed: {error_msg}")
@@ -88,6 +100,30 @@ class ClaimsProcessingPipeline:
                 "processing_record": processing_record
             }
     
+    async def start_processing_many(self, sender_emails: List[str]) -> List[Dict[str, Any]]:
+        """Process several senders concurrently, at most MAX_CONCURRENT_RUNS at a time; results follow input order"""
+        async with asyncio.TaskGroup() as task_group:
+            tasks = [task_group.create_task(self._start_processing_bounded(sender_email)) for sender_email in sender_emails]
+        return [task.result() for task in tasks]
+    
+    async def _start_processing_bounded(self, sender_email: str) -> Dict[str, Any]:
+        async with self._run_slots:
+            return await self.start_processing(sender_email)
+    
+    def _record(self, processing_record: Dict[str, Any]):
+        self.processing_history.append(processing_record)
+        
+        if processing_record["status"] == "COMPLETED":
+            self._successful += 1
+        else:
+            self._failed += 1
+        
+        if processing_record.get("duration_seconds"):
+            self._duration_sum += processing_record["duration_seconds"]
+            self._duration_count += 1
+        
+        self._recommendation_counts[processing_record.get("recommendation", "UNKNOWN")] += 1
+    
     async def get_agent_status(self, agent_id: str) -> Optional[Dict[str, Any]]:
         if agent_id in self.active_agents:
             return await self.active_agents[agent_id].get_comprehensive_status()
@@ -104,30 +140,18 @@ class ClaimsProcessingPipeline:
         return list(self.active_agents.keys())
     
     def get_processing_history(self, limit: int = 50) -> List[Dict[str, Any]]:
-        return self.processing_history[-limit:]
+        return list(self.processing_history)[-limit:]
     
     def get_pipeline_stats(self) -> Dict[str, Any]:
-        total_processed = len(self.processing_history)
-        successful = len([r for r in self.processing_history if r.get("status") == "COMPLETED"])
-        failed = len([r for r in self.processing_history if r.get("status") == "FAILED"])
-        
-        avg_duration = 0
-        if total_processed > 0:
-            durations = [r.get("duration_seconds", 0) for r in self.processing_history if r.get("duration_seconds")]
-            avg_duration = sum(durations) / len(durations) if durations else 0
-        
-        recommendations = {}
-        for record in self.processing_history:
-            rec = record.get("recommendation", "UNKNOWN")
-            recommendations[rec] = recommendations.get(rec, 0) + 1
+        total_processed = self._successful + self._failed
         
         return {
             "total_processed": total_processed,
-            "successful": successful,
-            "failed": failed,
-            "success_rate": (successful / total_processed * 100) if total_processed > 0 else 0,
+            "successful": self._successful,
+            "failed": self._failed,
+            "success_rate": (self._successful / total_processed * 100) if total_processed > 0 else 0,
             "active_agents": len(self.active_agents),
-            "average_processing_time": avg_duration,
-            "recommendations_breakdown": recommendations,
+            "average_processing_time": self._duration_sum / self._duration_count if self._duration_count else 0,
+            "recommendations_breakdown": dict(self._recommendation_counts),
             "last_processing": self.processing_history[-1] if self.processing_history else None
         }
\ No newline at end of file
@@ -1,13 +0,0 @@
-import os
-import uvicorn
-from dotenv import load_dotenv
-
-load_dotenv()
-
-if __name__ == "__main__":
-    uvicorn.run(
-        "main:app",
-        host=os.getenv("HOST", "0.0.0.0"),
-        port=int(os.getenv("PORT", 8000)),
-        reload=os.getenv("DEBUG", "False").lower() == "true"
-    )
\ No newline at end of file
@@ -1,21 +1,226 @@
 import os
 import pickle
+import random
+import time
+import uuid
 from pathlib import Path
-from typing import List, Optional
-import faiss
-import numpy as np
-from langchain.document_loaders import (
-    PyPDFLoader,
-    Docx2txtLoader,
-    UnstructuredExcelLoader,
-    UnstructuredWordDocumentLoader,
-    UnstructuredPDFLoader
-)
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain.embeddings import OpenAIEmbeddings
-from langchain.vectorstores import FAISS
-from langchain.schema import Document
-import openai
+from typing import TYPE_CHECKING, List, Optional
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+
+# faiss, numpy and the LangChain loaders are imported where they are used: this module is
+# pulled in by the agents package on every start-up, including spawned loader workers
+if TYPE_CHECKING:
+    from langchain.schema import Document
+    from langchain.vectorstores import FAISS
+
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", 256))
+EMBEDDING_TOKENS_PER_MINUTE = int(os.getenv("EMBEDDING_TOKENS_PER_MINUTE", 250000))
+EMBEDDING_MAX_CONCURRENCY = int(os.getenv("EMBEDDING_MAX_CONCURRENCY", 4))
+# Below this many chunks an exact flat scan is already fast and HNSW's build cost isn't worth it
+HNSW_MIN_VECTORS = int(os.getenv("HNSW_MIN_VECTORS", 10_000))
+HNSW_NEIGHBORS = 32
+# Past this size full-precision vectors dominate memory, so they are product-quantized (6KB -> 48B each)
+IVFPQ_MIN_VECTORS = int(os.getenv("IVFPQ_MIN_VECTORS", 200_000))
+IVFPQ_SUBQUANTIZERS = 48
+IVFPQ_NPROBE = int(os.getenv("IVFPQ_NPROBE", 16))
+# "pq" for the smallest index, "sq8" (1 byte per dimension) when PQ's recall loss is too much
+IVF_QUANTIZER = os.getenv("IVF_QUANTIZER", "pq").lower()
+# Serve searches from GPU 0 when faiss-gpu is installed; stores are always written from a CPU copy
+FAISS_USE_GPU = os.getenv("FAISS_USE_GPU", "false").lower() == "true"
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "embedding_cache")
+# Queries at least this cosine-similar to an earlier one reuse its search results
+QUERY_CACHE_SIMILARITY = float(os.getenv("QUERY_CACHE_SIMILARITY", 0.97))
+QUERY_CACHE_SIZE = 256
+
+@lru_cache(maxsize=1)
+def _get_embedding_token_bucket():
+    from document_processing.parsers.rate_limiter import TokenBucket
+    return TokenBucket(EMBEDDING_TOKENS_PER_MINUTE)
+
+@lru_cache(maxsize=1)
+def _get_gpu_resources():
+    import faiss
+    
+    if not hasattr(faiss, "StandardGpuResources") or faiss.get_num_gpus() == 0:
+        return None
+    return faiss.StandardGpuResources()
+
+def _move_index_to_gpu(vector_store: 'FAISS') -> 'FAISS':
+    import faiss
+    
+    resources = _get_gpu_resources() if FAISS_USE_GPU else None
+    if resources is not None:
+        try:
+            vector_store.index = faiss.index_cpu_to_gpu(resources, 0, vector_store.index)
+        except RuntimeError:
+            # HNSW has no GPU implementation; it stays on the CPU
+            pass
+    return vector_store
+
+def save_faiss_store(vector_store: 'FAISS', save_path: str):
+    """Write the raw index plus a JSON docstore (chunks in index-row order) instead of LangChain's pickle"""
+    import faiss
+    import orjson
+    
+    os.makedirs(save_path, exist_ok=True)
+    index = vector_store.index
+    if hasattr(faiss, "GpuIndex") and isinstance(index, faiss.GpuIndex):
+        index = faiss.index_gpu_to_cpu(index)
+    faiss.write_index(index, os.path.join(save_path, "index.faiss"))
+    
+    documents = [
+        vector_store.docstore.search(vector_store.index_to_docstore_id[row])
+        for row in range(len(vector_store.index_to_docstore_id))
+    ]
+    with open(os.path.join(save_path, "docstore.json"), "wb") as docstore_file:
+        docstore_file.write(orjson.dumps(
+            [{"page_content": doc.page_content, "metadata": doc.metadata} for doc in documents],
+            option=orjson.OPT_SERIALIZE_NUMPY,
+            default=str
+        ))
+
+def load_faiss_store(load_path: str, embeddings) -> 'FAISS':
+    """Load a store written by save_faiss_store as a unit-normalized inner-product store"""
+    # LangChain only normalizes for Euclidean stores (and warns otherwise), so query
+    # vectors are normalized by the callers: similarity_search, search_many, query_documents
+    import faiss
+    import orjson
+    from langchain.docstore import InMemoryDocstore
+    from langchain.schema import Document
+    from langchain.vectorstores import FAISS
+    from langchain_community.vectorstores.utils import DistanceStrategy
+    
+    index = faiss.read_index(os.path.join(load_path, "index.faiss"))
+    with open(os.path.join(load_path, "docstore.json"), "rb") as docstore_file:
+        records = orjson.loads(docstore_file.read())
+    
+    ids = [str(row) for row in range(len(records))]
+    return _move_index_to_gpu(FAISS(
+        embeddings,
+        index,
+        InMemoryDocstore({doc_id: Document(**record) for doc_id, record in zip(ids, records)}),
+        dict(enumerate(ids)),
+        normalize_L2=False,
+        distance_strategy=DistanceStrategy.MAX_INNER_PRODUCT
+    ))
+
+def similarity_search(vector_store: 'FAISS', query: str, k: int) -> List['Document']:
+    """vector_store.similarity_search with the query unit-normalized like the stored vectors"""
+    import faiss
+    import numpy as np
+    
+    query_vector = np.asarray([vector_store.embeddings.embed_query(query)], dtype=np.float32)
+    faiss.normalize_L2(query_vector)
+    return vector_store.similarity_search_by_vector(query_vector[0].tolist(), k=k)
+
+def search_many(vector_store: 'FAISS', queries: List[str], k: int) -> List[List[tuple]]:
+    """Embed every query in one request and search them in one index call; a (doc, score) list per query"""
+    import faiss
+    import numpy as np
+    
+    query_vectors = np.asarray(vector_store.embeddings.embed_documents(queries), dtype=np.float32)
+    # Stores from create_embeddings / load_faiss_store are unit-normalized inner-product indexes
+    faiss.normalize_L2(query_vectors)
+    scores, ids = vector_store.index.search(query_vectors, k)
+    
+    docstore = vector_store.docstore
+    index_to_docstore_id = vector_store.index_to_docstore_id
+    return [
+        [
+            (docstore.search(index_to_docstore_id[int(doc_id)]), float(score))
+            for score, doc_id in zip(query_scores, query_ids)
+            if doc_id != -1
+        ]
+        for query_scores, query_ids in zip(scores, ids)
+    ]
+
+@lru_cache(maxsize=None)
+def get_embeddings(openai_api_key: str):
+    """One embeddings client per key, sending requests over the parsers' pooled keep-alive connections"""
+    from langchain.embeddings import CacheBackedEmbeddings, OpenAIEmbeddings
+    from langchain.storage import LocalFileStore
+    from document_processing.parsers.base import get_http_client
+    
+    openai_embeddings = OpenAIEmbeddings(
+        openai_api_key=openai_api_key,
+        chunk_size=EMBEDDING_BATCH_SIZE,
+        http_client=get_http_client()
+    )
+    # Vectors are stored under the SHA-256 of the chunk text, so rebuilds only pay for new chunks
+    return CacheBackedEmbeddings.from_bytes_store(
+        openai_embeddings,
+        LocalFileStore(EMBEDDING_CACHE_PATH),
+        namespace=openai_embeddings.model,
+        key_encoder="sha256"
+    )
+
+def _load_pdf(file_path: Path) -> List['Document']:
+    from langchain.document_loaders import PyPDFLoader, UnstructuredPDFLoader
+    
+    try:
+        if _has_text_layer(file_path):
+            return PyPDFLoader(str(file_path)).load()
+        return UnstructuredPDFLoader(str(file_path)).load()
+    except Exception:
+        return UnstructuredPDFLoader(str(file_path)).load()
+
+def _load_word(file_path: Path) -> List['Document']:
+    from langchain.document_loaders import Docx2txtLoader, UnstructuredWordDocumentLoader
+    
+    try:
+        documents = Docx2txtLoader(str(file_path)).load()
+        if documents and any(len(doc.page_content.strip()) >= 50 for doc in documents):
+            return documents
+    except Exception:
+        pass
+    return UnstructuredWordDocumentLoader(str(file_path)).load()
+
+def _load_excel(file_path: Path) -> List['Document']:
+    from langchain.document_loaders import UnstructuredExcelLoader
+    
+    return UnstructuredExcelLoader(str(file_path)).load()
+
+def _has_text_layer(file_path: Path) -> bool:
+    # PyMuPDF probe that stops at the first page with real text, so scanned PDFs
+    # go straight to OCR instead of being parsed by PyPDF first
+    import fitz
+    from document_processing.processors.pdf_processor import PDF_TEXT_FLAGS
+    
+    with fitz.open(str(file_path)) as pdf_doc:
+        return any(len(page.get_text("text", flags=PDF_TEXT_FLAGS).strip()) >= 100 for page in pdf_doc)
+
+_LOADERS = {
+    '.pdf': _load_pdf,
+    '.docx': _load_word,
+    '.doc': _load_word,
+    '.xlsx': _load_excel,
+    '.xls': _load_excel
+}
+
+def load_document(file_path: Path) -> List['Document']:
+    """Load one file into Documents; module-level so it can run in the loader worker processes"""
+    file_extension = file_path.suffix.lower()
+    load = _LOADERS.get(file_extension)
+    if load is None:
+        print(f"Unsupported file type: {file_extension}")
+        return []
+    
+    try:
+        documents = load(file_path)
+        
+        for doc in documents:
+            doc.metadata.update({
+                'source': str(file_path),
+                'filename': file_path.name,
+                'file_type': file_extension
+            })
+        
+        return documents
+        
+    except Exception as e:
+        print(f"Error loading {file_path}: {str(e)}")
+        return []
 
 class DocumentEmbeddingSystem:
     def __init__(self, openai_api_key: str = None, downloads_folder: str = "downloads"):
@@ -25,67 +230,27 @@ class DocumentEmbeddingSystem:
         if not openai_api_key:
             raise ValueError("OpenAI API key not provided and not found in environment variables")
         
+        import openai
+        from langchain.text_splitter import RecursiveCharacterTextSplitter
+        
         self.downloads_folder = Path(downloads_folder)
-        self.embeddings = OpenAIEmbeddings(openai_api_key=openai_api_key)
+        self.embeddings = get_embeddings(openai_api_key)
         self.text_splitter = RecursiveCharacterTextSplitter(
             chunk_size=1000,
             chunk_overlap=200,
             length_function=len,
         )
         self.vector_store = None
+        self._reset_query_cache()
         
         openai.api_key = openai_api_key
         
-        self.supported_extensions = {'.pdf', '.docx', '.doc', '.xlsx', '.xls'}
+        self.supported_extensions = set(_LOADERS)
     
-    def load_document(self, file_path: Path) -> List[Document]:
-        file_extension = file_path.suffix.lower()
-        
-        try:
-            if file_extension == '.pdf':
-                try:
-                    loader = PyPDFLoader(str(file_path))
-                    documents = loader.load()
-                    if not documents or all(len(doc.page_content.strip()) < 100 for doc in documents):
-                        loader = UnstructuredPDFLoader(str(file_path))
-                        documents = loader.load()
-                except Exception:
-                    loader = UnstructuredPDFLoader(str(file_path))
-                    documents = loader.load()
-                    
-            elif file_extension in ['.docx', '.doc']:
-                try:
-                    loader = Docx2txtLoader(str(file_path))
-                    documents = loader.load()
-                    if not documents or all(len(doc.page_content.strip()) < 50 for doc in documents):
-                        loader = UnstructuredWordDocumentLoader(str(file_path))
-                        documents = loader.load()
-                except Exception:
-                    loader = UnstructuredWordDocumentLoader(str(file_path))
-                    documents = loader.load()
-                    
-            elif file_extension in ['.xlsx', '.xls']:
-                loader = UnstructuredExcelLoader(str(file_path))
-                documents = loader.load()
-                
-            else:
-                print(f"Unsupported file type: {file_extension}")
-                return []
-            
-            for doc in documents:
-                doc.metadata.update({
-                    'source': str(file_path),
-                    'filename': file_path.name,
-                    'file_type': file_extension
-                })
-            
-            return documents
-            
-        except Exception as e:
-            print(f"Error loading {file_path}: {str(e)}")
-            return []
+    def load_document(self, file_path: Path) -> List['Document']:
+        return load_document(file_path)
     
-    def process_documents(self) -> List[Document]:
+    def process_documents(self) -> List['Document']:
         if not self.downloads_folder.exists():
             raise FileNotFoundError(f"Downloads folder not found: {self.downloads_folder}")
         
@@ -94,42 +259,177 @@ class DocumentEmbeddingSystem:
         
         print(f"Scanning folder: {self.downloads_folder}")
         
-        for file_path in self.downloads_folder.iterdir():
-            if file_path.is_file() and file_path.suffix.lower() in self.supported_extensions:
-                print(f"Processing: {file_path.name}")
-                documents = self.load_document(file_path)
-                
-                if documents:
-                    chunks = self.text_splitter.split_documents(documents)
-                    all_documents.extend(chunks)
-                    processed_files += 1
-                    print(f"  -> Added {len(chunks)} chunks")
-                else:
-                    print(f"  -> Failed to load document")
+        # scandir's DirEntry.is_file() answers from the directory listing instead of a stat() per file
+        with os.scandir(self.downloads_folder) as entries:
+            file_paths = [
+                Path(entry.path) for entry in entries
+                if os.path.splitext(entry.name)[1].lower() in self.supported_extensions and entry.is_file()
+            ]
+        
+        # PyPDF and Unstructured parse in pure Python and hold the GIL, so files load side by
+        # side in the shared loader processes rather than on threads
+        from document_processing.extractors.document_extractor import get_loader_pool
+        
+        loaded = list(get_loader_pool().map(load_document, file_paths))
+        
+        for file_path, documents in zip(file_paths, loaded):
+            print(f"Processing: {file_path.name}")
+            
+            if documents:
+                chunks = self.text_splitter.split_documents(documents)
+                all_documents.extend(chunks)
+                processed_files += 1
+                print(f"  -> Added {len(chunks)} chunks")
+            else:
+                print(f"  -> Failed to load document")
         
         print(f"\nProcessed {processed_files} files, created {len(all_documents)} chunks")
         return all_documents
     
-    def create_embeddings(self, documents: List[Document]) -> FAISS:
+    def create_embeddings(self, documents: List['Document']) -> 'FAISS':
         if not documents:
             raise ValueError("No documents provided for embedding creation")
         
+        import faiss
+        import numpy as np
+        from langchain.docstore import InMemoryDocstore
+        from langchain.vectorstores import FAISS
+        from langchain_community.vectorstores.utils import DistanceStrategy
+        
         print("Creating embeddings...")
-        vector_store = FAISS.from_documents(documents, self.embeddings)
+        texts = [doc.page_content for doc in documents]
+        # Whitespace-only differences between extractions shouldn't miss the embedding cache
+        normalized_texts = [" ".join(text.split()) for text in texts]
+        
+        # Repeated boilerplate (headers, footers, disclaimers) is embedded once; later copies
+        # reuse the vector and get their own index rows after all the unique texts
+        first_doc = {}
+        duplicate_docs = []
+        for doc_num, text in enumerate(normalized_texts):
+            if text in first_doc:
+                duplicate_docs.append(doc_num)
+            else:
+                first_doc[text] = doc_num
+        unique_texts = list(first_doc)
+        repeated_texts = {normalized_texts[doc_num] for doc_num in duplicate_docs}
+        repeated_vectors = {}
+        
+        batches = [
+            unique_texts[start:start + EMBEDDING_BATCH_SIZE]
+            for start in range(0, len(unique_texts), EMBEDDING_BATCH_SIZE)
+        ]
+        
+        # One request per batch, several batches in flight, instead of one batch at a time.
+        # Each batch goes into the index as it arrives, so no full list of Python floats is held
+        index = None
+        untrained = []
+        with ThreadPoolExecutor(max_workers=EMBEDDING_MAX_CONCURRENCY) as executor:
+            for batch_texts, batch in zip(batches, executor.map(self._embed_batch, batches)):
+                xb = np.asarray(batch, dtype=np.float32)
+                # Unit vectors make inner product equal cosine similarity
+                faiss.normalize_L2(xb)
+                if index is None:
+                    index, train_size = self._new_index(len(texts), xb.shape[1])
+                    train_size = min(train_size, len(unique_texts))
+                
+                for text, vector in zip(batch_texts, xb):
+                    if text in repeated_texts:
+                        repeated_vectors[text] = vector.copy()
+                
+                if index.is_trained:
+                    index.add(xb)
+                    continue
+                
+                # IVF indexes need a training sample before anything can be added
+                untrained.append(xb)
+                if sum(len(pending) for pending in untrained) >= train_size:
+                    sample = np.concatenate(untrained)
+                    untrained = []
+                    index.train(sample)
+                    index.add(sample)
+        
+        if duplicate_docs:
+            index.add(np.stack([repeated_vectors[normalized_texts[doc_num]] for doc_num in duplicate_docs]))
+        
+        # Index rows hold the unique texts' first documents, then the duplicates, with uuid
+        # docstore ids as FAISS.from_embeddings assigns
+        row_docs = list(first_doc.values()) + duplicate_docs
+        ids = [str(uuid.uuid4()) for _ in documents]
+        vector_store = FAISS(
+            self.embeddings,
+            index,
+            InMemoryDocstore(dict(zip(ids, documents))),
+            {row: ids[doc_num] for row, doc_num in enumerate(row_docs)},
+            normalize_L2=False,
+            distance_strategy=DistanceStrategy.MAX_INNER_PRODUCT
+        )
+        
+        if duplicate_docs:
+            print(f"Embedded {len(unique_texts)} unique chunks; {len(duplicate_docs)} duplicates reused their vectors")
         print(f"Created embeddings for {len(documents)} document chunks")
         
         return vector_store
     
-    def save_vector_store(self, vector_store: FAISS, save_path: str = "faiss_index"):
-        vector_store.save_local(save_path)
+    def _new_index(self, count: int, dim: int) -> tuple:
+        """Pick an index for count vectors and how many must be seen before it can be trained"""
+        import faiss
+        
+        nlist = int(4 * count ** 0.5)
+        if count < HNSW_MIN_VECTORS:
+            return faiss.IndexFlatIP(dim), 0
+        
+        # All indexes score by inner product and keep insertion order, so docstore ids line up
+        if count < IVFPQ_MIN_VECTORS:
+            index = faiss.IndexHNSWFlat(dim, HNSW_NEIGHBORS, faiss.METRIC_INNER_PRODUCT)
+        elif IVF_QUANTIZER == "sq8":
+            index = faiss.IndexIVFScalarQuantizer(
+                faiss.IndexFlatIP(dim), dim, nlist, faiss.ScalarQuantizer.QT_8bit, faiss.METRIC_INNER_PRODUCT
+            )
+        elif dim % IVFPQ_SUBQUANTIZERS == 0:
+            index = faiss.IndexIVFPQ(
+                faiss.IndexFlatIP(dim), dim, nlist, IVFPQ_SUBQUANTIZERS, 8, faiss.METRIC_INNER_PRODUCT
+            )
+        else:
+            index = faiss.IndexHNSWFlat(dim, HNSW_NEIGHBORS, faiss.METRIC_INNER_PRODUCT)
+        
+        if index.is_trained:
+            return index, 0
+        
+        index.nprobe = IVFPQ_NPROBE
+        # ~39 points per centroid for the coarse k-means and for PQ's 256 codewords
+        return index, min(count, max(39 * nlist, 39 * 256))
+    
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        from openai import RateLimitError
+        from document_processing.parsers.rate_limiter import LLM_MAX_RETRIES, count_tokens
+        
+        cached = self.embeddings.document_embedding_store.mget(texts)
+        if all(vector is not None for vector in cached):
+            return cached
+        
+        # Stagger the workers' first requests so they don't all land on the API at once
+        time.sleep(random.uniform(0.05, 0.2))
+        batch_tokens = sum(count_tokens(text) for text, vector in zip(texts, cached) if vector is None)
+        for attempt in range(LLM_MAX_RETRIES + 1):
+            # Concurrent batches share one per-minute token budget so they don't trip the API's TPM limit
+            _get_embedding_token_bucket().acquire(batch_tokens)
+            try:
+                return self.embeddings.embed_documents(texts)
+            except RateLimitError:
+                if attempt == LLM_MAX_RETRIES:
+                    raise
+                time.sleep(2 ** attempt + random.uniform(0, 1))
+    
+    def save_vector_store(self, vector_store: 'FAISS', save_path: str = "faiss_index"):
+        save_faiss_store(vector_store, save_path)
         print(f"Vector store saved to: {save_path}")
     
-    def load_vector_store(self, load_path: str = "faiss_index") -> FAISS:
-        vector_store = FAISS.load_local(load_path, self.embeddings, allow_dangerous_deserialization=True)
+    def load_vector_store(self, load_path: str = "faiss_index") -> 'FAISS':
+        vector_store = load_faiss_store(load_path, self.embeddings)
         print(f"Vector store loaded from: {load_path}")
         return vector_store
     
-    def build_vector_store(self, save_path: str = "faiss_index") -> FAISS:
+    def build_vector_store(self, save_path: str = "faiss_index") -> 'FAISS':
         documents = self.process_documents()
         
         if not documents:
@@ -139,19 +439,70 @@ class DocumentEmbeddingSystem:
         
         self.save_vector_store(vector_store, save_path)
         
-        self.vector_store = vector_store
+        self.vector_store = _move_index_to_gpu(vector_store)
+        self._reset_query_cache()
         
         return vector_store
     
-    def query_documents(self, query: str, k: int = 5, score_threshold: float = 0.5) -> List[tuple]:
+    def query_documents(self, query: str, k: int = 5, score_threshold: float = 0.75, nprobe: Optional[int] = None) -> List[tuple]:
+        if self.vector_store is None:
+            raise ValueError("Vector store not initialized. Run build_vector_store() first or load an existing one.")
+        
+        # Only IVF indexes probe clusters; more probes trade speed for recall
+        if nprobe is not None and hasattr(self.vector_store.index, "nprobe"):
+            self.vector_store.index.nprobe = nprobe
+        
+        import numpy as np
+        
+        query_vector = np.asarray(self.embeddings.embed_query(query), dtype=np.float32)
+        query_vector /= np.linalg.norm(query_vector)
+        
+        if self._query_cache_results:
+            similarities = np.stack(self._query_cache_vectors) @ query_vector
+            best = int(similarities.argmax())
+            cached_k, cached_threshold, cached_results = self._query_cache_results[best]
+            if similarities[best] >= QUERY_CACHE_SIMILARITY and cached_k >= k and cached_threshold <= score_threshold:
+                # Scores are cosine similarities: higher is closer
+                return [(doc, score) for doc, score in cached_results if score >= score_threshold][:k]
+        
+        results = self._search_above(query_vector, k, score_threshold)
+        if len(self._query_cache_results) >= QUERY_CACHE_SIZE:
+            del self._query_cache_vectors[0], self._query_cache_results[0]
+        self._query_cache_vectors.append(query_vector)
+        self._query_cache_results.append((k, score_threshold, results))
+        
+        return results
+    
+    def query_documents_batch(self, queries: List[str], k: int = 5, score_threshold: float = 0.75) -> List[List[tuple]]:
         if self.vector_store is None:
             raise ValueError("Vector store not initialized. Run build_vector_store() first or load an existing one.")
         
-        results = self.vector_store.similarity_search_with_score(query, k=k)
+        return [
+            [(doc, score) for doc, score in results if score >= score_threshold]
+            for results in search_many(self.vector_store, queries, k)
+        ]
+    
+    def _search_above(self, query_vector, k: int, score_threshold: float) -> List[tuple]:
+        """Best k chunks scoring at least score_threshold, best first"""
+        import numpy as np
         
-        filtered_results = [(doc, score) for doc, score in results if score <= score_threshold]
+        try:
+            # The index returns only the hits over the threshold, so nothing is fetched just to be filtered out
+            _, scores, ids = self.vector_store.index.range_search(query_vector[np.newaxis], score_threshold)
+        except RuntimeError:
+            # Index types without range search support
+            results = self.vector_store.similarity_search_with_score_by_vector(query_vector.tolist(), k=k)
+            return [(doc, score) for doc, score in results if score >= score_threshold]
         
-        return filtered_results
+        best = np.argsort(-scores, kind="stable")[:k]
+        docstore = self.vector_store.docstore
+        index_to_docstore_id = self.vector_store.index_to_docstore_id
+        return [(docstore.search(index_to_docstore_id[int(ids[i])]), float(scores[i])) for i in best]
+    
+    def _reset_query_cache(self):
+        # Unit-length query vectors and the (k, score_threshold, results) each one produced
+        self._query_cache_vectors = []
+        self._query_cache_results = []
     
     def print_query_results(self, query: str, k: int = 5):
         results = self.query_documents(query, k=k)
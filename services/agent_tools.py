@@ -1,34 +1,108 @@
 from langchain.tools import tool
 from langchain.agents import create_sql_agent
 from langchain.vectorstores import FAISS
-from langchain.embeddings import OpenAIEmbeddings
 from langchain.llms import OpenAI
 from sqlalchemy.orm import Session
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, func, select, text
+from sqlalchemy.engine import Engine
 from models.cash_call import CashCall
+from services.agent import search_many, similarity_search
 from typing import List, Dict, Any, Optional
+from functools import lru_cache
+from contextvars import ContextVar
 import json
 import os
-from datetime import datetime, date
+import re
+from datetime import date
 import pandas as pd
+import ahocorasick
 
-vector_store: FAISS = None
-db_engine = None
-embeddings = None
+EXCLUSION_KEYWORDS = {
+    "nuclear": ["nuclear", "radioactive", "contamination", "atomic"],
+    "war": ["war", "warlike", "hostilities", "rebellion", "revolution", "civil war"],
+    "strikes": ["strike", "riot", "civil commotion", "srcc", "labour disturbance"],
+    "terrorism": ["terrorism", "terrorist", "malicious damage"],
+    "cyber": ["cyber", "computer virus", "hacking", "cyber attack", "electronic"],
+    "chemical_biological": ["chemical", "biological", "bio-chemical", "biochemical", "toxic"],
+    "electromagnetic": ["electromagnetic", "emp", "electronic warfare"],
+    "pollution": ["pollution", "seepage", "contamination", "environmental"],
+    "asbestos": ["asbestos", "asbestos-related"],
+    "sanctions": ["sanction", "embargo", "prohibited trade"],
+    "insolvency": ["insolvency", "bankruptcy", "financial failure"],
+    "liability": ["liability", "third party", "extra-contractual"],
+    "cargo_transit": ["transit", "voyage", "cargo termination"],
+    "ism": ["ism", "safety management", "ship management"]
+}
 
-def initialize_tools(vector_store_instance: FAISS, database_url: str, openai_api_key: str):
-    global vector_store, db_engine, embeddings
-    vector_store = vector_store_instance
-    db_engine = create_engine(database_url)
-    embeddings = OpenAIEmbeddings(openai_api_key=openai_api_key)
+def _keyword_pattern(keywords: List[str]) -> re.Pattern:
+    return re.compile("|".join(map(re.escape, keywords)), re.IGNORECASE)
+
+def _build_exclusion_automaton() -> ahocorasick.Automaton:
+    # Some keywords (e.g. "contamination") belong to several exclusion types
+    types_by_keyword = {}
+    for exclusion_type, keywords in EXCLUSION_KEYWORDS.items():
+        for keyword in keywords:
+            types_by_keyword.setdefault(keyword, []).append(exclusion_type)
+    
+    automaton = ahocorasick.Automaton()
+    for keyword, exclusion_types in types_by_keyword.items():
+        automaton.add_word(keyword, (keyword, exclusion_types))
+    automaton.make_automaton()
+    return automaton
+
+_EXCLUSION_AUTOMATON = _build_exclusion_automaton()
+
+def _exclusion_hits(text: str) -> Dict[str, set]:
+    """Map each exclusion type to the keywords found in lowercase text, in one pass"""
+    hits = {}
+    for _, (keyword, exclusion_types) in _EXCLUSION_AUTOMATON.iter(text):
+        for exclusion_type in exclusion_types:
+            hits.setdefault(exclusion_type, set()).add(keyword)
+    return hits
+
+CLAIM_TERMS_PATTERN = _keyword_pattern(["claim", "paid", "outstanding", "amount"])
+STATEMENT_TERMS_PATTERN = _keyword_pattern(["total", "balance", "commission", "premium"])
+# Case-insensitive searches instead of lowercasing every filename and page per hit
+BORDEREAUX_PATTERN = _keyword_pattern(["bordereaux"])
+STATEMENT_PATTERN = _keyword_pattern(["statement"])
+ACCOUNT_PATTERN = _keyword_pattern(["account"])
+NOTIFICATION_PATTERN = _keyword_pattern(["notification"])
+EXCLUSION_TERMS_PATTERN = _keyword_pattern(["exclusion", "excluded"])
+
+QUARTER_MONTHS = {
+    "Q1": ["01", "02", "03"],
+    "Q2": ["04", "05", "06"],
+    "Q3": ["07", "08", "09"],
+    "Q4": ["10", "11", "12"]
+}
+_MONTH_TO_QUARTER = {month: quarter for quarter, months in QUARTER_MONTHS.items() for month in months}
+
+# Per-run tool state. Each analysis runs in its own asyncio task, and LangChain copies the
+# task's context into the threads that run sync tools, so concurrent runs keep their own store
+_vector_store: ContextVar[Optional[FAISS]] = ContextVar("vector_store", default=None)
+_db_engine: ContextVar[Optional[Engine]] = ContextVar("db_engine", default=None)
+_treaty_exclusions: ContextVar[Optional[Dict[str, List[Dict[str, Any]]]]] = ContextVar("treaty_exclusions", default=None)
+
+@lru_cache(maxsize=None)
+def _get_engine(database_url: str):
+    # An engine owns a connection pool; one per URL rather than one per analysis run.
+    # Pre-ping drops connections the server closed while the pool sat idle between runs
+    return create_engine(database_url, pool_pre_ping=True, pool_size=10)
+
+def initialize_tools(vector_store_instance: FAISS, database_url: str):
+    """Point the tools at this run's vector store and database; call from the task running the analysis"""
+    _vector_store.set(vector_store_instance)
+    _db_engine.set(_get_engine(database_url))
+    _treaty_exclusions.set({})
 
 @tool
 def query_documents(query: str, k: int = 5) -> str:
     """Query the vector store to find relevant document content with enhanced page-level analysis"""
+    vector_store = _vector_store.get()
     if not vector_store:
         return "Vector store not initialized"
     
-    results = vector_store.similarity_search(query, k=k)
+    results = similarity_search(vector_store, query, k=k)
     formatted_results = []
     
     for i, doc in enumerate(results):
@@ -46,29 +120,29 @@ def query_documents(query: str, k: int = 5) -> str:
     
     return json.dumps(formatted_results, indent=2)
 
-@tool
-def extract_bordereaux_claims() -> str:
-    """Extract claims data from bordereaux documents with page-specific targeting"""
-    if not vector_store:
-        return "Vector store not initialized"
-    
-    bordereaux_queries = [
-        "bordereaux claims paid outstanding transaction",
-        "claim number transaction date paid amount",
-        "settlement case outstanding claims table",
-        "policy number claim amount transaction"
-    ]
-    
+BORDEREAUX_QUERIES = [
+    "bordereaux claims paid outstanding transaction",
+    "claim number transaction date paid amount",
+    "settlement case outstanding claims table",
+    "policy number claim amount transaction"
+]
+STATEMENT_QUERIES = [
+    "statement total claims balance income",
+    "quarterly account commission premium",
+    "total income outgo balance cedant",
+    "account period underwriting year"
+]
+
+def _collect_bordereaux_claims(results_per_query: List[List[tuple]]) -> List[Dict[str, Any]]:
+    vector_store = _vector_store.get()
     claims_data = []
     
-    for query in bordereaux_queries:
-        results = vector_store.similarity_search(query, k=3)
-        
-        for doc in results:
+    for results in results_per_query:
+        for doc, _ in results:
             doc_type = doc.metadata.get("document_type", "")
-            filename = doc.metadata.get("filename", "").lower()
+            filename = doc.metadata.get("filename", "")
             
-            if doc_type == "claims_bordereaux" or "bordereaux" in filename or "bordereaux" in doc.page_content.lower():
+            if doc_type == "claims_bordereaux" or BORDEREAUX_PATTERN.search(filename) or BORDEREAUX_PATTERN.search(doc.page_content):
                 claims_data.append({
                     "source": doc.metadata.get("filename", "Unknown"),
                     "page_number": doc.metadata.get("page_number", "N/A"),
@@ -78,10 +152,9 @@ def extract_bordereaux_claims() -> str:
                 })
     
     if not claims_data:
-        generic_results = vector_store.similarity_search("claims data amounts table", k=5)
+        generic_results = similarity_search(vector_store, "claims data amounts table", k=5)
         for doc in generic_results:
-            content_lower = doc.page_content.lower()
-            if any(term in content_lower for term in ["claim", "paid", "outstanding", "amount"]):
+            if CLAIM_TERMS_PATTERN.search(doc.page_content):
                 claims_data.append({
                     "source": doc.metadata.get("filename", "Unknown"),
                     "page_number": doc.metadata.get("page_number", "N/A"),
@@ -90,31 +163,18 @@ def extract_bordereaux_claims() -> str:
                     "extraction_method": "generic_search"
                 })
     
-    return json.dumps(claims_data, indent=2)
+    return claims_data
 
-@tool
-def extract_statement_totals() -> str:
-    """Extract total amounts from cedant statements with page-specific targeting"""
-    if not vector_store:
-        return "Vector store not initialized"
-    
-    statement_queries = [
-        "statement total claims balance income",
-        "quarterly account commission premium",
-        "total income outgo balance cedant",
-        "account period underwriting year"
-    ]
-    
+def _collect_statement_totals(results_per_query: List[List[tuple]]) -> List[Dict[str, Any]]:
+    vector_store = _vector_store.get()
     statement_data = []
     
-    for query in statement_queries:
-        results = vector_store.similarity_search(query, k=3)
-        
-        for doc in results:
+    for results in results_per_query:
+        for doc, _ in results:
             doc_type = doc.metadata.get("document_type", "")
-            filename = doc.metadata.get("filename", "").lower()
+            filename = doc.metadata.get("filename", "")
             
-            if doc_type == "cedant_statement" or "statement" in filename or "account" in doc.page_content.lower():
+            if doc_type == "cedant_statement" or STATEMENT_PATTERN.search(filename) or ACCOUNT_PATTERN.search(doc.page_content):
                 statement_data.append({
                     "source": doc.metadata.get("filename", "Unknown"),
                     "page_number": doc.metadata.get("page_number", "N/A"),
@@ -124,10 +184,9 @@ def extract_statement_totals() -> str:
                 })
     
     if not statement_data:
-        generic_results = vector_store.similarity_search("total balance premium commission", k=5)
+        generic_results = similarity_search(vector_store, "total balance premium commission", k=5)
         for doc in generic_results:
-            content_lower = doc.page_content.lower()
-            if any(term in content_lower for term in ["total", "balance", "commission", "premium"]):
+            if STATEMENT_TERMS_PATTERN.search(doc.page_content):
                 statement_data.append({
                     "source": doc.metadata.get("filename", "Unknown"),
                     "page_number": doc.metadata.get("page_number", "N/A"),
@@ -136,22 +195,44 @@ def extract_statement_totals() -> str:
                     "extraction_method": "generic_search"
                 })
     
-    return json.dumps(statement_data, indent=2)
+    return statement_data
 
 @tool
-def extract_treaty_exclusions(treaty_name: str = "") -> str:
-    """Extract exclusions from treaty documents in the vector store"""
-    query = f"exclusions excluded risks perils {treaty_name}" if treaty_name else "exclusions excluded risks perils"
+def extract_bordereaux_claims() -> str:
+    """Extract claims data from bordereaux documents with page-specific targeting"""
+    vector_store = _vector_store.get()
+    if not vector_store:
+        return "Vector store not initialized"
     
+    # One embedding request and one index search for all four queries
+    claims_data = _collect_bordereaux_claims(search_many(vector_store, BORDEREAUX_QUERIES, k=3))
+    return json.dumps(claims_data, indent=2)
+
+@tool
+def extract_statement_totals() -> str:
+    """Extract total amounts from cedant statements with page-specific targeting"""
+    vector_store = _vector_store.get()
     if not vector_store:
         return "Vector store not initialized"
     
-    results = vector_store.similarity_search(query, k=3)
+    statement_data = _collect_statement_totals(search_many(vector_store, STATEMENT_QUERIES, k=3))
+    return json.dumps(statement_data, indent=2)
+
+def _extract_treaty_exclusions_cached(treaty_name: str = "") -> List[Dict[str, Any]]:
+    # Exclusions don't change within a run, so each treaty costs one query embedding and search;
+    # callers must not mutate the returned list
+    vector_store = _vector_store.get()
+    cache = _treaty_exclusions.get()
+    if cache is not None and treaty_name in cache:
+        return cache[treaty_name]
+    
+    query = f"exclusions excluded risks perils {treaty_name}" if treaty_name else "exclusions excluded risks perils"
+    
+    results = similarity_search(vector_store, query, k=3)
     exclusions = []
     
     for doc in results:
-        content = doc.page_content.lower()
-        if "exclusion" in content or "excluded" in content:
+        if EXCLUSION_TERMS_PATTERN.search(doc.page_content):
             exclusions.append({
                 "source": doc.metadata.get("filename", "Unknown"),
                 "page_number": doc.metadata.get("page_number", "N/A"),
@@ -159,24 +240,36 @@ def extract_treaty_exclusions(treaty_name: str = "") -> str:
                 "exclusion_text": doc.page_content[:300]
             })
     
-    return json.dumps(exclusions, indent=2)
+    if cache is not None:
+        cache[treaty_name] = exclusions
+    return exclusions
+
+@tool
+def extract_treaty_exclusions(treaty_name: str = "") -> str:
+    """Extract exclusions from treaty documents in the vector store"""
+    vector_store = _vector_store.get()
+    if not vector_store:
+        return "Vector store not initialized"
+    
+    return json.dumps(_extract_treaty_exclusions_cached(treaty_name), indent=2)
 
 @tool
 def extract_notification_details(claim_number: str = "") -> str:
     """Extract claim notification details from documents"""
+    vector_store = _vector_store.get()
     query = f"claim notification {claim_number}" if claim_number else "claim notification insured loss date"
     
     if not vector_store:
         return "Vector store not initialized"
     
-    results = vector_store.similarity_search(query, k=3)
+    results = similarity_search(vector_store, query, k=3)
     notification_data = []
     
     for doc in results:
         doc_type = doc.metadata.get("document_type", "")
-        filename = doc.metadata.get("filename", "").lower()
+        filename = doc.metadata.get("filename", "")
         
-        if doc_type == "claim_notification" or "notification" in filename or "notification" in doc.page_content.lower():
+        if doc_type == "claim_notification" or NOTIFICATION_PATTERN.search(filename) or NOTIFICATION_PATTERN.search(doc.page_content):
             notification_data.append({
                 "source": doc.metadata.get("filename", "Unknown"),
                 "page_number": doc.metadata.get("page_number", "N/A"),
@@ -189,40 +282,28 @@ def extract_notification_details(claim_number: str = "") -> str:
 @tool
 def validate_claim_against_exclusions(claim_description: str, cause_of_loss: str) -> str:
     """Check if a claim violates treaty exclusions"""
-    exclusions_data = extract_treaty_exclusions()
-    exclusions = json.loads(exclusions_data)
+    vector_store = _vector_store.get()
+    exclusions = _extract_treaty_exclusions_cached() if vector_store else []
     
     violations = []
     claim_text = f"{claim_description} {cause_of_loss}".lower()
     
-    exclusion_keywords = {
-        "nuclear": ["nuclear", "radioactive", "contamination", "atomic"],
-        "war": ["war", "warlike", "hostilities", "rebellion", "revolution", "civil war"],
-        "strikes": ["strike", "riot", "civil commotion", "srcc", "labour disturbance"],
-        "terrorism": ["terrorism", "terrorist", "malicious damage"],
-        "cyber": ["cyber", "computer virus", "hacking", "cyber attack", "electronic"],
-        "chemical_biological": ["chemical", "biological", "bio-chemical", "biochemical", "toxic"],
-        "electromagnetic": ["electromagnetic", "emp", "electronic warfare"],
-        "pollution": ["pollution", "seepage", "contamination", "environmental"],
-        "asbestos": ["asbestos", "asbestos-related"],
-        "sanctions": ["sanction", "embargo", "prohibited trade"],
-        "insolvency": ["insolvency", "bankruptcy", "financial failure"],
-        "liability": ["liability", "third party", "extra-contractual"],
-        "cargo_transit": ["transit", "voyage", "cargo termination"],
-        "ism": ["ism", "safety management", "ship management"]
+    claim_hits = _exclusion_hits(claim_text)
+    claim_matches = {
+        exclusion_type: [kw for kw in keywords if kw in claim_hits[exclusion_type]]
+        for exclusion_type, keywords in EXCLUSION_KEYWORDS.items()
+        if exclusion_type in claim_hits
     }
     
     for exclusion in exclusions:
         exclusion_text = exclusion["exclusion_text"].lower()
+        exclusion_types = _exclusion_hits(exclusion_text).keys()
         
-        for exclusion_type, keywords in exclusion_keywords.items():
-            claim_match = any(keyword in claim_text for keyword in keywords)
-            exclusion_match = any(keyword in exclusion_text for keyword in keywords)
-            
-            if claim_match and exclusion_match:
+        for exclusion_type, matched_keywords in claim_matches.items():
+            if exclusion_type in exclusion_types:
                 violations.append({
                     "violation_type": exclusion_type,
-                    "matched_keywords": [kw for kw in keywords if kw in claim_text],
+                    "matched_keywords": matched_keywords,
                     "source": exclusion["source"],
                     "exclusion_reference": exclusion_text[:200],
                     "severity": "HIGH"
@@ -239,8 +320,14 @@ def validate_claim_against_exclusions(claim_description: str, cause_of_loss: str
 @tool
 def compare_bordereaux_vs_statement(underwriting_year: int) -> str:
     """Compare bordereaux totals against statement totals for specific year"""
-    bordereaux_data = json.loads(extract_bordereaux_claims())
-    statement_data = json.loads(extract_statement_totals())
+    vector_store = _vector_store.get()
+    if not vector_store:
+        return "Vector store not initialized"
+    
+    # Both query sets share one embedding request and one index search
+    results_per_query = search_many(vector_store, BORDEREAUX_QUERIES + STATEMENT_QUERIES, k=3)
+    bordereaux_data = _collect_bordereaux_claims(results_per_query[:len(BORDEREAUX_QUERIES)])
+    statement_data = _collect_statement_totals(results_per_query[len(BORDEREAUX_QUERIES):])
     
     comparison = {
         "underwriting_year": underwriting_year,
@@ -259,8 +346,8 @@ def compare_bordereaux_vs_statement(underwriting_year: int) -> str:
 def validate_claim_dates(claim_data: str, policy_from: str, policy_to: str) -> str:
     """Validate if claim dates fall within policy period"""
     try:
-        policy_start = datetime.strptime(policy_from, "%Y-%m-%d").date()
-        policy_end = datetime.strptime(policy_to, "%Y-%m-%d").date()
+        policy_start = date.fromisoformat(policy_from)
+        policy_end = date.fromisoformat(policy_to)
         
         validation = {
             "policy_period": f"{policy_from} to {policy_to}",
@@ -285,30 +372,41 @@ def validate_claim_dates(claim_data: str, policy_from: str, policy_to: str) -> s
 @tool
 def check_duplicate_claims_in_database(claim_id: str, insured_name: str = "") -> str:
     """Check for duplicate claims in the cash_calls database table"""
+    db_engine = _db_engine.get()
     if not db_engine:
         return json.dumps({"error": "Database not initialized"})
     
     try:
         with db_engine.connect() as conn:
-            query = text("SELECT * FROM cash_calls WHERE claim_id = :claim_id")
-            result = conn.execute(query, {"claim_id": claim_id})
-            existing_claims = result.fetchall()
+            # Served by ix_cashcall_claim_dol (claim_id leads); the window count still
+            # covers every duplicate even though only the first rows are returned
+            query = (
+                select(
+                    CashCall.id, CashCall.claim_id, CashCall.business_title,
+                    CashCall.amount_original, CashCall.date_of_booking,
+                    func.count().over().label("duplicates_found")
+                )
+                .where(CashCall.claim_id == claim_id)
+                .limit(10)
+            )
+            existing_claims = conn.execute(query).all()
+            duplicates_found = existing_claims[0].duplicates_found if existing_claims else 0
             
             duplicate_check = {
                 "claim_id": claim_id,
-                "duplicates_found": len(existing_claims),
+                "duplicates_found": duplicates_found,
                 "existing_records": [],
-                "is_duplicate": len(existing_claims) > 0,
-                "recommendation": "REJECT" if len(existing_claims) > 0 else "PROCEED"
+                "is_duplicate": duplicates_found > 0,
+                "recommendation": "REJECT" if duplicates_found > 0 else "PROCEED"
             }
             
             for row in existing_claims:
                 duplicate_check["existing_records"].append({
-                    "id": row[0],
-                    "claim_id": row[1],
-                    "business_title": row[4] if len(row) > 4 else "",
-                    "amount_original": str(row[8]) if len(row) > 8 else "0",
-                    "date_of_booking": str(row[12]) if len(row) > 12 else ""
+                    "id": row.id,
+                    "claim_id": row.claim_id,
+                    "business_title": row.business_title or "",
+                    "amount_original": str(row.amount_original or 0),
+                    "date_of_booking": str(row.date_of_booking or "")
                 })
             
             return json.dumps(duplicate_check, indent=2)
@@ -323,23 +421,17 @@ def check_duplicate_claims_in_database(claim_id: str, insured_name: str = "") ->
 def validate_accounting_quarter(claim_date: str, accounting_quarter: str) -> str:
     """Validate if claim payment falls within the accounting quarter"""
     try:
-        quarter_map = {
-            "Q1": ["01", "02", "03"],
-            "Q2": ["04", "05", "06"], 
-            "Q3": ["07", "08", "09"],
-            "Q4": ["10", "11", "12"]
-        }
-        
         claim_month = claim_date[5:7] if len(claim_date) >= 7 else "00"
         quarter = accounting_quarter.upper()[:2]
+        is_valid = _MONTH_TO_QUARTER.get(claim_month) == quarter
         
         validation = {
             "claim_date": claim_date,
             "accounting_quarter": accounting_quarter,
-            "is_valid": claim_month in quarter_map.get(quarter, []),
-            "expected_months": quarter_map.get(quarter, []),
+            "is_valid": is_valid,
+            "expected_months": QUARTER_MONTHS.get(quarter, []),
             "actual_month": claim_month,
-            "recommendation": "PROCEED" if claim_month in quarter_map.get(quarter, []) else "REVIEW"
+            "recommendation": "PROCEED" if is_valid else "REVIEW"
         }
         
         return json.dumps(validation, indent=2)
@@ -353,6 +445,7 @@ def validate_accounting_quarter(claim_date: str, accounting_quarter: str) -> str
 @tool
 def calculate_recovery_amounts() -> str:
     """Calculate recovery amounts from cash calls vs statements"""
+    db_engine = _db_engine.get()
     try:
         with db_engine.connect() as conn:
             query = text("""
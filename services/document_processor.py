@@ -1,5 +1,5 @@
 from typing import List, Dict, Any
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, raiseload
 from datetime import datetime
 from document_processing import DocumentProcessingPipeline
 from models.processing_batch import ProcessingBatch
@@ -92,12 +92,20 @@ class DocumentProcessingService:
         return batch
     
     def get_batch_status(self, batch_id: int) -> Dict[str, Any]:
-        batch = self.db.query(ProcessingBatch).filter(ProcessingBatch.id == batch_id).first()
+        batch = self.db.query(ProcessingBatch).options(raiseload("*")).filter(ProcessingBatch.id == batch_id).first()
         
         if not batch:
             return {"error": "Batch not found"}
         
-        documents = self.db.query(DocumentUpload).filter(
+        # Only the columns reported below, as plain rows rather than ORM instances
+        documents = self.db.query(
+            DocumentUpload.filename,
+            DocumentUpload.file_type,
+            DocumentUpload.status,
+            DocumentUpload.claims_extracted,
+            DocumentUpload.premiums_extracted,
+            DocumentUpload.error_message
+        ).filter(
             DocumentUpload.batch_id == batch_id
         ).all()
         
@@ -1,10 +1,13 @@
 import json
 import logging
-from typing import List, Dict
+from typing import List, Dict, Any, Tuple
 from dataclasses import dataclass
 from enum import Enum
+from functools import lru_cache
 from openai import OpenAI
 import os
+import threading
+import time
 
 class DocumentType(Enum):
     CLAIMS_NOTIFICATION = "Claims Notification Document"
@@ -13,6 +16,19 @@ class DocumentType(Enum):
     TREATY_SLIP = "Treaty Slip/Contract"
     SICS_TREATY_SLIP = "SICS Treaty Slip"
 
+# Emails per request in analyze_emails_batch; each analysis needs up to ~1500 output tokens
+EMAIL_ANALYSIS_BATCH_SIZE = int(os.getenv("EMAIL_ANALYSIS_BATCH_SIZE", 5))
+EMAIL_ANALYSIS_MAX_TOKENS = 1500
+EMAIL_ANALYSIS_MODEL = "gpt-4o-mini"
+# Bump when the prompts change so cached analyses of the old wording aren't served
+EMAIL_PROMPT_VERSION = "v1"
+EMAIL_ANALYSIS_CACHE_TTL = int(os.getenv("EMAIL_ANALYSIS_CACHE_TTL", 7 * 86400))
+EMAIL_SEMANTIC_CACHE_PATH = os.getenv("EMAIL_SEMANTIC_CACHE_PATH", "email_semantic_cache")
+EMAIL_SEMANTIC_CACHE_MODEL = "text-embedding-3-small"
+# Emails this cosine-similar (and with the same attachments) are taken to be the same submission
+EMAIL_SEMANTIC_CACHE_SIMILARITY = float(os.getenv("EMAIL_SEMANTIC_CACHE_SIMILARITY", 0.95))
+EMAIL_SEMANTIC_CACHE_SIZE = int(os.getenv("EMAIL_SEMANTIC_CACHE_SIZE", 5000))
+
 MANDATORY_DOCS = [
     DocumentType.CLAIMS_NOTIFICATION.value,
     DocumentType.CLAIMS_BORDEREAUX.value,
@@ -25,6 +41,14 @@ class DocumentFound:
     document_type: DocumentType
     confidence: str
     key_identifiers: List[str]
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "filename": self.filename,
+            "document_type": self.document_type.value,
+            "confidence": self.confidence,
+            "key_identifiers": list(self.key_identifiers)
+        }
 
 @dataclass
 class AnalysisReport:
@@ -35,6 +59,106 @@ class AnalysisReport:
     missing_documents: List[str]
     completion_status: str
     summary: str
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "email_subject": self.email_subject,
+            "sender": self.sender,
+            "documents_found": [doc.to_dict() for doc in self.documents_found],
+            "all_documents_present": self.all_documents_present,
+            "missing_documents": list(self.missing_documents),
+            "completion_status": self.completion_status,
+            "summary": self.summary
+        }
+
+class SemanticEmailCache:
+    """Earlier attachment classifications found again by embedding similarity of subject and body"""
+
+    def __init__(self, client: OpenAI, path: str):
+        self._client = client
+        # One directory per prompt version, so prompt changes start from an empty cache
+        self._path = os.path.join(path, EMAIL_PROMPT_VERSION, "cache.npz")
+        self._lock = threading.Lock()
+        self._vectors, self._entries = self._load()
+
+    def _load(self) -> Tuple[Any, List[Dict[str, Any]]]:
+        import numpy as np
+        
+        empty = (np.empty((0, 0), dtype=np.float32), [])
+        if not os.path.exists(self._path):
+            return empty
+        try:
+            with np.load(self._path, allow_pickle=False) as data:
+                vectors = data["vectors"]
+                entries = json.loads(str(data["entries"]))
+            if vectors.ndim != 2 or len(vectors) != len(entries):
+                raise ValueError(f"{len(vectors)} vectors for {len(entries)} entries")
+        except Exception as e:
+            logging.warning(f"Ignoring unreadable semantic email cache {self._path}: {e}")
+            return empty
+        
+        fresh = [entry_num for entry_num, entry in enumerate(entries) if self._is_fresh(entry)]
+        return vectors[fresh], [entries[entry_num] for entry_num in fresh]
+
+    def _is_fresh(self, entry: Dict[str, Any]) -> bool:
+        return time.time() - entry.get("created_at", 0) <= EMAIL_ANALYSIS_CACHE_TTL
+
+    def embed(self, texts: List[str]):
+        """Unit-length embeddings of whitespace- and case-normalized texts, in one request"""
+        import numpy as np
+        
+        normalized = [" ".join(text.lower().split()) for text in texts]
+        response = self._client.embeddings.create(model=EMAIL_SEMANTIC_CACHE_MODEL, input=normalized)
+        vectors = np.asarray([item.embedding for item in response.data], dtype=np.float32)
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    def lookup(self, vector, attachments: List[str]) -> Any:
+        attachments = sorted(attachments)
+        with self._lock:
+            if not self._entries or self._vectors.shape[1] != len(vector):
+                return None
+            similarities = self._vectors @ vector
+            entries = self._entries
+        
+        for entry_num in similarities.argsort()[::-1]:
+            if similarities[entry_num] < EMAIL_SEMANTIC_CACHE_SIMILARITY:
+                break
+            entry = entries[entry_num]
+            if entry["attachments"] == attachments and self._is_fresh(entry):
+                return entry["documents_found"]
+        return None
+
+    def store(self, vector, attachments: List[str], documents_found: List[Dict[str, Any]]):
+        """Add an entry in memory; save() writes the cache out"""
+        import numpy as np
+        
+        entry = {"attachments": sorted(attachments), "documents_found": documents_found, "created_at": time.time()}
+        with self._lock:
+            if self._entries and self._vectors.shape[1] == len(vector):
+                vectors = np.vstack([self._vectors, vector])
+                entries = self._entries + [entry]
+            else:
+                vectors = vector[np.newaxis]
+                entries = [entry]
+            # Oldest entries go first once the cache is full
+            keep = len(entries) - EMAIL_SEMANTIC_CACHE_SIZE
+            if keep > 0:
+                vectors, entries = vectors[keep:], entries[keep:]
+            self._vectors, self._entries = vectors, entries
+
+    def save(self):
+        import numpy as np
+        
+        with self._lock:
+            vectors, entries = self._vectors, self._entries
+        try:
+            os.makedirs(os.path.dirname(self._path), exist_ok=True)
+            # One file swapped in with os.replace, so vectors and entries can never disagree
+            temp_path = f"{self._path}.{os.getpid()}.{threading.get_ident()}.tmp.npz"
+            np.savez(temp_path, vectors=vectors, entries=np.array(json.dumps(entries)))
+            os.replace(temp_path, self._path)
+        except Exception as e:
+            logging.warning(f"Could not save semantic email cache: {e}")
 
 class SimpleEmailAnalyzer:
     
@@ -46,6 +170,7 @@ class SimpleEmailAnalyzer:
             raise ValueError("OPENAI_API_KEY not provided and not found in environment variables")
             
         self.client = OpenAI(api_key=api_key)
+        self.sem_cache = SemanticEmailCache(self.client, EMAIL_SEMANTIC_CACHE_PATH)
 
     def create_analysis_prompt(self, email_subject: str, email_body: str, attachments: List[str]) -> str:
         prompt = f"""
@@ -57,7 +182,7 @@ EMAIL BODY:
 {email_body}
 
 ATTACHMENT FILES:
-{chr(10).join([f"- {filename}" for filename in attachments])}
+{chr(10).join([f"- {filename}" for filename in sorted(attachments)])}
 
 MANDATORY DOCUMENTS (all 3 must be present for completeness):
 1. Claims Notification Document - Contains claim reference, insured details, loss date
@@ -104,16 +229,83 @@ Mark as "Complete" if all 3 mandatory document types are identified, even if in
 """
         return prompt
 
-    def call_openai_api(self, prompt: str) -> Dict:
+    def create_batch_prompt(self, emails: List[Tuple[str, str, List[str]]]) -> str:
+        email_descriptors = [
+            {"id": email_id, "subject": subject, "body": body, "attachments": sorted(attachments)}
+            for email_id, (subject, body, attachments) in enumerate(emails)
+        ]
+        prompt = f"""
+You are an insurance document expert. Analyze EACH email below, independently, to determine which required documents are present.
+
+EMAILS (JSON array):
+{json.dumps(email_descriptors, indent=2)}
+
+MANDATORY DOCUMENTS (all 3 must be present for completeness):
+1. Claims Notification Document - Contains claim reference, insured details, loss date
+2. Claims Bordereaux - Tabular claims data with amounts, dates, policy numbers  
+3. Cedant/Insurer Statement - Quarterly statement with totals and recoveries
+
+IMPORTANT: A single PDF file may contain multiple document types on different pages. For example:
+- Page 1: Claims Statement
+- Page 2: Claims Bordereaux
+This should count as having BOTH documents present.
+
+ANALYSIS RULES:
+- If a PDF contains tabular data AND statement information, mark BOTH bordereaux AND statement as present
+- Look for keywords indicating multiple document types within single files
+- Consider combined documents as complete submissions
+- Only use an email's own body and attachments when analyzing it
+
+Return analyses as a JSON list in the same order, one per email, carrying the email's "id", in this exact JSON format:
+{{
+    "analyses": [
+        {{
+            "id": 0,
+            "email_subject": "subject of email 0",
+            "sender": "extracted from email",
+            "documents_found": [
+                {{
+                    "filename": "exact_filename.pdf",
+                    "document_type": "Claims Bordereaux",
+                    "confidence": "High",
+                    "key_identifiers": ["Table data", "Transaction dates"]
+                }}
+            ],
+            "all_documents_present": false,
+            "missing_documents": ["Claims Notification Document", "Cedant/Insurer Statement"],
+            "completion_status": "Incomplete",
+            "summary": "Only the bordereaux was found."
+        }}
+    ]
+}}
+
+Mark an email as "Complete" if all 3 mandatory document types are identified, even if in combined files.
+"""
+        return prompt
+
+    def call_openai_api(self, prompt: str, max_tokens: int = EMAIL_ANALYSIS_MAX_TOKENS) -> Dict:
+        from document_processing.parsers.llm_cache import get_llm_cache, make_cache_key
+        
+        # Re-runs over the same email are answered from the shared SQLite response cache
+        key = make_cache_key(EMAIL_ANALYSIS_MODEL, prompt, EMAIL_PROMPT_VERSION)
+        try:
+            cached = get_llm_cache().get(key, max_age=EMAIL_ANALYSIS_CACHE_TTL)
+            if cached is not None:
+                return json.loads(cached)
+        except Exception as e:
+            # A locked or corrupt cache only costs the API call
+            logging.warning(f"LLM cache lookup failed: {e}")
+        
         try:
             response = self.client.chat.completions.create(
-                model="gpt-4o-mini",
+                model=EMAIL_ANALYSIS_MODEL,
                 messages=[
                     {"role": "system", "content": "You are an expert insurance document analyst. Recognize that single files can contain multiple document types. Always respond with valid JSON in the exact format requested."},
                     {"role": "user", "content": prompt}
                 ],
                 temperature=0.1,
-                max_tokens=1500
+                max_tokens=max_tokens,
+                response_format={"type": "json_object"}
             )
 
             content = response.choices[0].message.content.strip()
@@ -123,13 +315,89 @@ Mark as "Complete" if all 3 mandatory document types are identified, even if in
             if content.endswith("```"):
                 content = content[:-3]
 
-            return json.loads(content)
-
+            parsed = json.loads(content)
         except Exception as e:
             logging.error(f"OpenAI API error: {e}")
             return {"error": str(e)}
 
-    def analyze_email_content(self, email_subject: str, email_body: str, attachments: List[str]) -> AnalysisReport:
+        try:
+            get_llm_cache().set(key, json.dumps(parsed))
+        except Exception as e:
+            logging.warning(f"LLM cache write failed: {e}")
+        return parsed
+
+    def analyze_email_content(self, email_subject: str, email_body: str, attachments: List[str], sender: str = None) -> AnalysisReport:
+        return self.analyze_emails_batch([(email_subject, email_body, attachments)], [sender])[0]
+
+    def analyze_emails_batch(self, emails: List[Tuple[str, str, List[str]]], senders: List[str] = None) -> List[AnalysisReport]:
+        """Analyze (subject, body, attachments) emails, several per request; reports follow input order"""
+        if not emails:
+            return []
+        senders = senders or [None] * len(emails)
+        
+        # Near-duplicates of earlier emails cost one embedding request instead of a chat completion
+        try:
+            vectors = self.sem_cache.embed([f"{subject}\n{body}" for subject, body, _ in emails])
+        except Exception as e:
+            logging.warning(f"Semantic cache unavailable: {e}")
+            vectors = None
+        
+        reports = [None] * len(emails)
+        misses = []
+        for email_id, (email_subject, _, attachments) in enumerate(emails):
+            cached = self.sem_cache.lookup(vectors[email_id], attachments) if vectors is not None else None
+            if cached is not None:
+                # Only the attachment classification is reused; everything else describes this email
+                reports[email_id] = self._build_report(email_subject, {
+                    "email_subject": email_subject,
+                    "sender": senders[email_id] or "Unknown",
+                    "documents_found": cached,
+                    "summary": "Classification reused from an earlier, near-identical email with the same attachments."
+                })
+            else:
+                misses.append(email_id)
+        
+        for start in range(0, len(misses), EMAIL_ANALYSIS_BATCH_SIZE):
+            batch_ids = misses[start:start + EMAIL_ANALYSIS_BATCH_SIZE]
+            batch = [emails[email_id] for email_id in batch_ids]
+            if len(batch) == 1:
+                batch_reports = [self._analyze_single(*batch[0])]
+            else:
+                batch_reports = self._analyze_batch(batch)
+            
+            for email_id, report in zip(batch_ids, batch_reports):
+                reports[email_id] = report
+                if vectors is not None and report.completion_status != "Error":
+                    documents_found = [document.to_dict() for document in report.documents_found]
+                    self.sem_cache.store(vectors[email_id], emails[email_id][2], documents_found)
+        
+        if vectors is not None and misses:
+            self.sem_cache.save()
+        return reports
+
+    def _analyze_batch(self, emails: List[Tuple[str, str, List[str]]]) -> List[AnalysisReport]:
+        # One request and one copy of the instructions for the whole batch
+        response = self.call_openai_api(
+            self.create_batch_prompt(emails),
+            max_tokens=EMAIL_ANALYSIS_MAX_TOKENS * len(emails)
+        )
+
+        analyses = {}
+        if "error" not in response:
+            for analysis_data in response.get("analyses", []):
+                if isinstance(analysis_data, dict) and isinstance(analysis_data.get("id"), int):
+                    analyses[analysis_data["id"]] = analysis_data
+
+        reports = []
+        for email_id, (email_subject, email_body, attachments) in enumerate(emails):
+            if email_id in analyses:
+                reports.append(self._build_report(email_subject, analyses[email_id]))
+            else:
+                # Dropped or unparseable in the batched answer: ask about this email alone
+                reports.append(self._analyze_single(email_subject, email_body, attachments))
+        return reports
+
+    def _analyze_single(self, email_subject: str, email_body: str, attachments: List[str]) -> AnalysisReport:
         try:
             prompt = self.create_analysis_prompt(email_subject, email_body, attachments)
             response = self.call_openai_api(prompt)
@@ -145,34 +413,7 @@ Mark as "Complete" if all 3 mandatory document types are identified, even if in
                     summary=f"Analysis failed: {response['error']}"
                 )
 
-            analysis_data = response.get("analysis", {})
-
-            documents_found = []
-            for doc_data in analysis_data.get("documents_found", []):
-                try:
-                    doc_type = DocumentType(doc_data["document_type"])
-                    document = DocumentFound(
-                        filename=doc_data.get("filename", ""),
-                        document_type=doc_type,
-                        confidence=doc_data.get("confidence", "Low"),
-                        key_identifiers=doc_data.get("key_identifiers", [])
-                    )
-                    documents_found.append(document)
-                except (ValueError, KeyError) as e:
-                    logging.warning(f"Error parsing document: {e}")
-
-            found_doc_types = [doc.document_type.value for doc in documents_found]
-            missing_docs = [doc_type for doc_type in MANDATORY_DOCS if doc_type not in found_doc_types]
-
-            return AnalysisReport(
-                email_subject=analysis_data.get("email_subject", email_subject),
-                sender=analysis_data.get("sender", "Unknown"),
-                documents_found=documents_found,
-                all_documents_present=len(missing_docs) == 0,
-                missing_documents=missing_docs,
-                completion_status="Complete" if len(missing_docs) == 0 else "Incomplete",
-                summary=analysis_data.get("summary", "No summary provided")
-            )
+            return self._build_report(email_subject, response.get("analysis", {}))
 
         except Exception as e:
             logging.error(f"Email analysis error: {e}")
@@ -186,6 +427,34 @@ Mark as "Complete" if all 3 mandatory document types are identified, even if in
                 summary=f"Analysis error: {str(e)}"
             )
 
+    def _build_report(self, email_subject: str, analysis_data: Dict) -> AnalysisReport:
+        documents_found = []
+        for doc_data in analysis_data.get("documents_found", []):
+            try:
+                doc_type = DocumentType(doc_data["document_type"])
+                document = DocumentFound(
+                    filename=doc_data.get("filename", ""),
+                    document_type=doc_type,
+                    confidence=doc_data.get("confidence", "Low"),
+                    key_identifiers=doc_data.get("key_identifiers", [])
+                )
+                documents_found.append(document)
+            except (ValueError, KeyError) as e:
+                logging.warning(f"Error parsing document: {e}")
+
+        found_doc_types = [doc.document_type.value for doc in documents_found]
+        missing_docs = [doc_type for doc_type in MANDATORY_DOCS if doc_type not in found_doc_types]
+
+        return AnalysisReport(
+            email_subject=analysis_data.get("email_subject", email_subject),
+            sender=analysis_data.get("sender", "Unknown"),
+            documents_found=documents_found,
+            all_documents_present=len(missing_docs) == 0,
+            missing_documents=missing_docs,
+            completion_status="Complete" if len(missing_docs) == 0 else "Incomplete",
+            summary=analysis_data.get("summary", "No summary provided")
+        )
+
     def generate_report(self, analysis: AnalysisReport) -> str:
         lines = []
         lines.append("=" * 60)
@@ -225,4 +494,9 @@ Mark as "Complete" if all 3 mandatory document types are identified, even if in
         lines.append("")
         lines.append("=" * 60)
 
-        return "\n".join(lines)
\ No newline at end of file
+        return "\n".join(lines)
+
+@lru_cache(maxsize=None)
+def get_email_analyzer(api_key: str = None) -> SimpleEmailAnalyzer:
+    """Shared analyzer per API key, so its OpenAI client and connection pool are reused across runs"""
+    return SimpleEmailAnalyzer(api_key)
\ No newline at end of file
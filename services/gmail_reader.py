@@ -1,10 +1,20 @@
 import imaplib
 import email
+import base64
+import quopri
+from email.utils import collapse_rfc2231_value, decode_rfc2231
+from itertools import takewhile
+from urllib.parse import unquote
 from email.message import Message   
 import logging
 from typing import List, Optional, Dict, Any
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 import os
+import re
+
+ATTACHMENT_WRITE_WORKERS = int(os.getenv("ATTACHMENT_WRITE_WORKERS", 8))
+FETCH_UID_PATTERN = re.compile(rb'UID (\d+)')
 
 @dataclass
 class EmailContent:
@@ -14,7 +24,161 @@ class EmailContent:
     date: str
     body_text: str
     attachment_filenames: List[str]
-    raw_email_content: str
+
+def _parse_fetch_response(msg_data: List[Any]) -> List[Any]:
+    """Parse imaplib FETCH output into nested lists; atoms and strings are bytes, NIL is None"""
+    # imaplib hands literals over as (b'... {size}', payload) tuples; everything else is raw text
+    chunks = []
+    for item in msg_data:
+        if isinstance(item, tuple):
+            chunks.append((False, re.sub(rb'\{\d+\}$', b'', item[0])))
+            chunks.append((True, item[1]))
+        elif item is not None:
+            chunks.append((False, item))
+    
+    root = []
+    stack = [root]
+    for is_literal, chunk in chunks:
+        if is_literal:
+            stack[-1].append(chunk)
+            continue
+        pos = 0
+        while pos < len(chunk):
+            char = chunk[pos:pos + 1]
+            if char.isspace():
+                pos += 1
+            elif char == b'(':
+                stack[-1].append([])
+                stack.append(stack[-1][-1])
+                pos += 1
+            elif char == b')':
+                if len(stack) > 1:
+                    stack.pop()
+                pos += 1
+            elif char == b'"':
+                end = pos + 1
+                value = bytearray()
+                while end < len(chunk) and chunk[end:end + 1] != b'"':
+                    if chunk[end:end + 1] == b'\\':
+                        end += 1
+                    value += chunk[end:end + 1]
+                    end += 1
+                stack[-1].append(bytes(value))
+                pos = end + 1
+            else:
+                # Atoms run to whitespace or a paren, except inside a section like BODY[1.2]
+                end = pos
+                in_section = False
+                while end < len(chunk):
+                    next_char = chunk[end:end + 1]
+                    if next_char == b'[':
+                        in_section = True
+                    elif next_char == b']':
+                        in_section = False
+                    elif not in_section and (next_char.isspace() or next_char in (b'(', b')')):
+                        break
+                    end += 1
+                atom = chunk[pos:end]
+                stack[-1].append(None if atom.upper() == b'NIL' else atom)
+                pos = end
+    return root
+
+def _fetch_items(msg_data: List[Any]) -> Dict[bytes, Dict[bytes, Any]]:
+    """Data items of each message in a FETCH response, keyed by UID"""
+    items_by_uid = {}
+    parsed = _parse_fetch_response(msg_data)
+    for item_list in parsed:
+        if isinstance(item_list, list):
+            items = {
+                (key.upper() if isinstance(key, bytes) else key): value
+                for key, value in zip(item_list[::2], item_list[1::2])
+            }
+            if b'UID' in items:
+                items_by_uid[items[b'UID']] = items
+    return items_by_uid
+
+def _param_dict(params: Any) -> Dict[str, str]:
+    if not isinstance(params, list):
+        return {}
+    return {
+        key.decode('utf-8', errors='ignore').lower(): value.decode('utf-8', errors='ignore')
+        for key, value in zip(params[::2], params[1::2])
+        if isinstance(key, bytes) and isinstance(value, bytes)
+    }
+
+def _rfc2231_param(params: Dict[str, str], name: str) -> Optional[str]:
+    """A MIME parameter, decoding RFC 2231 extended (name*) and continued (name*0*, name*1) forms"""
+    if name in params:
+        return params[name]
+    pieces = []
+    for key, value in params.items():
+        match = re.fullmatch(re.escape(name) + r'\*(?:(\d+)(\*?))?', key)
+        if match:
+            encoded = match.group(1) is None or bool(match.group(2))
+            pieces.append((int(match.group(1) or 0), encoded, value))
+    if not pieces:
+        return None
+    
+    charset = language = None
+    text = ""
+    for index, encoded, value in sorted(pieces):
+        if encoded:
+            # Only the first piece carries the charset'language' prefix
+            if index == 0:
+                charset, language, value = decode_rfc2231(value)
+            value = unquote(value, encoding='latin-1')
+        text += value
+    return collapse_rfc2231_value((charset, language, text))
+
+def _walk_bodystructure(structure: List[Any], section: str = "") -> List[Dict[str, Any]]:
+    """MIME parts of a BODYSTRUCTURE with their section numbers, in the order msg.walk() visits them"""
+    if structure and isinstance(structure[0], list):
+        parts = []
+        # A multipart lists its children first, then its subtype and extension data
+        children = takewhile(lambda item: isinstance(item, list), structure)
+        for child_num, child in enumerate(children):
+            parts.extend(_walk_bodystructure(child, f"{section}.{child_num + 1}" if section else str(child_num + 1)))
+        return parts
+    
+    content_type = (structure[0] or b'').decode('ascii', errors='ignore').lower()
+    subtype = (structure[1] or b'').decode('ascii', errors='ignore').lower()
+    # Extension data (md5, then disposition) follows the type-specific fields
+    if content_type == "text":
+        extension_start = 8
+    elif content_type == "message" and subtype == "rfc822":
+        extension_start = 10
+    else:
+        extension_start = 7
+    disposition = structure[extension_start + 1] if len(structure) > extension_start + 1 else None
+    disposition_type = None
+    disposition_params = {}
+    if isinstance(disposition, list) and disposition and isinstance(disposition[0], bytes):
+        disposition_type = disposition[0].decode('ascii', errors='ignore').lower()
+        disposition_params = _param_dict(disposition[1] if len(disposition) > 1 else None)
+    
+    content_params = _param_dict(structure[2])
+    filename = _rfc2231_param(disposition_params, "filename") or _rfc2231_param(content_params, "name")
+    
+    section = section or "1"
+    parts = [{
+        "section": section,
+        "content_type": f"{content_type}/{subtype}",
+        "encoding": (structure[5] or b'7BIT').decode('ascii', errors='ignore').upper(),
+        "disposition": disposition_type,
+        "filename": filename
+    }]
+    # A forwarded email carries its own body structure; a single-part one is numbered <section>.1
+    nested = structure[8] if content_type == "message" and subtype == "rfc822" and len(structure) > 8 else None
+    if isinstance(nested, list) and nested:
+        parts.extend(_walk_bodystructure(nested, section if isinstance(nested[0], list) else f"{section}.1"))
+    return parts
+
+def _decode_part(payload: bytes, encoding: str) -> bytes:
+    if encoding == "BASE64":
+        return base64.b64decode(payload)
+    if encoding == "QUOTED-PRINTABLE":
+        return quopri.decodestring(payload)
+    return payload
 
 class FocusedGmailConnector:
     
@@ -23,6 +187,8 @@ class FocusedGmailConnector:
         self.password = password
         self.imap_server = None
         self.is_connected = False
+        # Raw RFC822 bytes by UID, so attachments are not downloaded a second time
+        self._raw_messages: Dict[str, bytes] = {}
         
     def connect(self) -> bool:
         try:
@@ -52,7 +218,7 @@ class FocusedGmailConnector:
             logging.error("Not connected to Gmail")
             return []
         try:
-            status, messages = self.imap_server.search(None, f'FROM "{sender_email}"')
+            status, messages = self.imap_server.uid('SEARCH', None, f'FROM "{sender_email}"')
             if status == 'OK' and messages[0]:
                 uids = messages[0].split()
                 return uids[-limit:] if limit else uids
@@ -66,7 +232,7 @@ class FocusedGmailConnector:
             logging.error("Not connected to Gmail")
             return []
         try:
-            status, messages = self.imap_server.search(None, f'FROM "{sender_email}" UNSEEN')
+            status, messages = self.imap_server.uid('SEARCH', None, f'FROM "{sender_email}" UNSEEN')
             if status == 'OK' and messages[0]:
                 uids = messages[0].split()
                 return uids[-limit:] if limit else uids
@@ -79,30 +245,137 @@ class FocusedGmailConnector:
         if not self.is_connected:
             logging.error("Not connected to Gmail")
             return None
+        contents = self.extract_email_contents([uid])
+        return contents[0] if contents else None
+    
+    def fetch_many(self, uids: List[bytes]) -> Dict[bytes, bytes]:
+        """Raw RFC822 bytes by UID, fetched with one UID FETCH over the whole set: one round trip"""
+        try:
+            status, msg_data = self.imap_server.uid('FETCH', b",".join(uids), '(RFC822)')
+            if status != 'OK':
+                return {}
+        except Exception as e:
+            logging.error(f"Error fetching emails {uids}: {e}")
+            return {}
+        
+        # Each message arrives as a (b'<seq> (UID <uid> RFC822 {size}', body) pair, then a b')' line
+        bodies = {}
+        for item in msg_data:
+            if isinstance(item, tuple):
+                match = FETCH_UID_PATTERN.search(item[0])
+                if match:
+                    bodies[match.group(1)] = item[1]
+        return bodies
+    
+    def extract_email_contents(self, uids: List[bytes]) -> List[EmailContent]:
+        if not self.is_connected:
+            logging.error("Not connected to Gmail")
+            return []
+        
+        bodies = self.fetch_many(uids)
+        results = []
+        for uid in uids:
+            if uid in bodies:
+                try:
+                    results.append(self._parse_email(uid, bodies[uid]))
+                except Exception as e:
+                    logging.error(f"Error extracting email content {uid}: {e}")
+        return results
+    
+    def _parse_email(self, uid: bytes, email_body: bytes) -> EmailContent:
+        self._raw_messages[uid.decode('utf-8')] = email_body
+        msg = email.message_from_bytes(email_body)
+        sender = msg.get('From', '')
+        subject = msg.get('Subject', '')
+        date = msg.get('Date', '')
+        body_text = self._extract_body_text(msg)
+        attachment_filenames = self._extract_attachment_filenames(msg)
+        return EmailContent(
+            uid=uid.decode('utf-8'),
+            sender=sender,
+            subject=subject,
+            date=date,
+            body_text=body_text,
+            attachment_filenames=attachment_filenames
+        )
+    
+    def fetch_summaries(self, uids: List[bytes]) -> List[EmailContent]:
+        """Headers, body text and attachment names, without downloading any attachment bodies"""
+        if not self.is_connected:
+            logging.error("Not connected to Gmail")
+            return []
         try:
-            status, msg_data = self.imap_server.fetch(uid, '(RFC822)')
-            if status != 'OK' or not msg_data[0]:
-                return None
-            email_body = msg_data[0][1]
-            msg = email.message_from_bytes(email_body)
-            sender = msg.get('From', '')
-            subject = msg.get('Subject', '')
-            date = msg.get('Date', '')
-            body_text = self._extract_body_text(msg)
-            attachment_filenames = self._extract_attachment_filenames(msg)
-            raw_content = email_body.decode('utf-8', errors='ignore')
-            return EmailContent(
+            uid_set = b",".join(uids)
+            status, msg_data = self.imap_server.uid('FETCH', uid_set, '(BODY.PEEK[HEADER] BODYSTRUCTURE)')
+            if status != 'OK':
+                return []
+            summaries = _fetch_items(msg_data)
+            
+            # Messages with the same text-part layout share one FETCH of just those parts
+            parts_by_uid = {}
+            uids_by_sections = {}
+            for uid, items in summaries.items():
+                structure = items.get(b'BODYSTRUCTURE') or []
+                parts = _walk_bodystructure(structure)
+                text_parts = [
+                    part for part in parts
+                    if part["content_type"] in ("text/plain", "text/html") and part["disposition"] != "attachment"
+                ]
+                # Mirrors msg.is_multipart(): an encapsulated message counts as multipart too
+                is_multipart = len(parts) > 1 or bool(structure) and isinstance(structure[0], list)
+                parts_by_uid[uid] = (is_multipart, parts, text_parts)
+                sections = tuple(part["section"] for part in text_parts)
+                if sections:
+                    uids_by_sections.setdefault(sections, []).append(uid)
+            
+            texts = {}
+            for sections, section_uids in uids_by_sections.items():
+                fetch_items = " ".join(f"BODY.PEEK[{section}]" for section in sections)
+                status, msg_data = self.imap_server.uid('FETCH', b",".join(section_uids), f'({fetch_items})')
+                if status == 'OK':
+                    texts.update(_fetch_items(msg_data))
+            
+            # PEEK leaves messages unseen; flag them as the full RFC822 fetch used to
+            self.imap_server.uid('STORE', uid_set, '+FLAGS', '\\Seen')
+        except Exception as e:
+            logging.error(f"Error fetching email summaries {uids}: {e}")
+            return []
+        
+        results = []
+        for uid in uids:
+            if uid not in summaries:
+                continue
+            header = email.message_from_bytes(summaries[uid].get(b'BODY[HEADER]') or b'')
+            is_multipart, parts, text_parts = parts_by_uid[uid]
+            results.append(EmailContent(
                 uid=uid.decode('utf-8'),
-                sender=sender,
-                subject=subject,
-                date=date,
-                body_text=body_text,
-                attachment_filenames=attachment_filenames,
-                raw_email_content=raw_content
-            )
+                sender=header.get('From', ''),
+                subject=header.get('Subject', ''),
+                date=header.get('Date', ''),
+                body_text=self._join_text_parts(is_multipart, text_parts, texts.get(uid, {})),
+                attachment_filenames=[
+                    part["filename"] for part in parts
+                    if part["disposition"] == "attachment" and part["filename"]
+                ]
+            ))
+        return results
+    
+    def _join_text_parts(self, is_multipart: bool, text_parts: List[Dict[str, Any]], items: Dict[bytes, Any]) -> str:
+        # Same selection as _extract_body_text: every plain part, HTML only while nothing else was found
+        body_text = ""
+        try:
+            for part in text_parts:
+                payload = items.get(f"BODY[{part['section']}]".encode())
+                if not isinstance(payload, bytes) or not payload:
+                    continue
+                text = _decode_part(payload, part["encoding"]).decode('utf-8', errors='ignore')
+                if part["content_type"] == "text/plain":
+                    body_text = body_text + text + "\n" if is_multipart else text
+                elif is_multipart and not body_text:
+                    body_text += re.sub(r'<[^>]+>', '', text) + "\n"
         except Exception as e:
-            logging.error(f"Error extracting email content {uid}: {e}")
-            return None
+            logging.error(f"Error extracting body text: {e}")
+        return body_text.strip()
     
     def _extract_body_text(self, msg: Message) -> str:
         body_text = ""
@@ -120,7 +393,6 @@ class FocusedGmailConnector:
                     elif content_type == 'text/html' and not body_text:
                         payload = part.get_payload(decode=True)
                         if payload:
-                            import re
                             html_content = payload.decode('utf-8', errors='ignore')
                             clean_text = re.sub(r'<[^>]+>', '', html_content)
                             body_text += clean_text + "\n"
@@ -157,15 +429,12 @@ class FocusedGmailConnector:
         if not uids:
             logging.info(f"No unread emails found from {sender_email}")
             return []
-        results = []
-        for uid in uids:
-            content = self.extract_email_content(uid)
-            if content:
-                results.append(content)
-        return results
+        # Unread emails are only analysed, so their attachments are fetched if and when they are downloaded
+        return self.fetch_summaries(uids)
     
     def download_attachments(self, email_content: EmailContent, download_folder: str = "downloads") -> List[str]:
-        if not self.is_connected:
+        raw_message = self._raw_messages.get(email_content.uid)
+        if raw_message is None and not self.is_connected:
             logging.error("Not connected to Gmail")
             return []
 
@@ -173,33 +442,41 @@ class FocusedGmailConnector:
         saved_files = []
 
         try:
-            status, msg_data = self.imap_server.fetch(email_content.uid.encode(), '(RFC822)')
-            if status != 'OK' or not msg_data[0]:
-                logging.error(f"Failed to fetch email UID {email_content.uid} for attachments")
-                return []
+            if raw_message is None:
+                raw_message = self.fetch_many([email_content.uid.encode()]).get(email_content.uid.encode())
+                if raw_message is None:
+                    logging.error(f"Failed to fetch email UID {email_content.uid} for attachments")
+                    return []
 
-            msg = email.message_from_bytes(msg_data[0][1])
+            msg = email.message_from_bytes(raw_message)
 
+            attachments = []
             for part in msg.walk():
                 if part.get_content_disposition() == 'attachment':
                     filename = part.get_filename()
                     if filename:
-                        filepath = os.path.join(download_folder, filename)
-                        with open(filepath, "wb") as f:
-                            f.write(part.get_payload(decode=True))
-                        saved_files.append(filepath)
-                        logging.info(f"Saved attachment: {filepath}")
+                        attachments.append((os.path.join(download_folder, filename), part))
+
+            with ThreadPoolExecutor(max_workers=ATTACHMENT_WRITE_WORKERS) as executor:
+                saved_files = list(executor.map(self._write_attachment, attachments))
 
         except Exception as e:
             logging.error(f"Error downloading attachments: {e}")
 
         return saved_files
     
+    def _write_attachment(self, attachment) -> str:
+        filepath, part = attachment
+        with open(filepath, "wb") as f:
+            f.write(part.get_payload(decode=True))
+        logging.info(f"Saved attachment: {filepath}")
+        return filepath
+    
     def mark_as_read(self, uid: str):
         if not self.is_connected:
             return
         try:
-            self.imap_server.store(uid.encode(), '+FLAGS', '\\Seen')
+            self.imap_server.uid('STORE', uid.encode(), '+FLAGS', '\\Seen')
         except Exception as e:
             logging.error(f"Error marking email as read: {e}")
     
@@ -1,10 +1,19 @@
 import asyncio
-import json
 import logging
 from typing import Set, Dict, Any
+import orjson
 import websockets
 from websockets.server import WebSocketServerProtocol
 
+def dumps_message(message: Dict[str, Any]) -> str:
+    """Encode a message with orjson; decoded so it still goes out as a text frame"""
+    # default=str covers Decimals and anything else orjson has no encoder for, as json.dumps(default=str) did
+    return orjson.dumps(
+        message,
+        default=str,
+        option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+    ).decode("utf-8")
+
 class WebSocketManager:
     
     def __init__(self):
@@ -15,7 +24,7 @@ class WebSocketManager:
         self.connections.add(websocket)
         self.logger.info(f"Client connected. Total connections: {len(self.connections)}")
         
-        await websocket.send(json.dumps({
+        await websocket.send(dumps_message({
             "type": "connection_established",
             "message": "Connected to Claims Processing Agent",
             "timestamp": asyncio.get_event_loop().time()
@@ -45,7 +54,7 @@ class WebSocketManager:
     
     async def send_to_client(self, websocket: WebSocketServerProtocol, message: Dict[str, Any]):
         try:
-            await websocket.send(json.dumps(message))
+            await websocket.send(dumps_message(message))
         except websockets.exceptions.ConnectionClosed:
             self.connections.discard(websocket)
         except Exception as e: